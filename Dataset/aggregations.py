@@ -0,0 +1,22 @@
+"""Agregaciones de varias métricas en una sola pasada agrupada."""
+
+from schema import GRADES
+
+SUMMARY_METRICS = ["mean", "count", "std", "min", "max"]
+
+
+def grade_summary(df, by, grades=GRADES, metrics=SUMMARY_METRICS):
+    """Media, conteo, desviación, mínimo y máximo de las notas agrupadas por ``by``.
+
+    Las llaves de agrupación se factorizan una sola vez para todas las notas y
+    métricas. El resultado tiene columnas ``(nota, métrica)``.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    return df.groupby(by, observed=True)[list(grades)].agg(metrics)
+
+
+def grade_table(summary, grade):
+    """Tabla plana de una nota: llaves de agrupación, promedio (``grade``) y métricas."""
+    table = summary[grade].rename(columns={"mean": grade}).reset_index()
+    table["count"] = table["count"].astype("int64")
+    return table
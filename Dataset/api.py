@@ -0,0 +1,431 @@
+"""API HTTP/JSON local con los mismos agregados que muestra el dashboard.
+
+Servidor asíncrono (Tornado sobre asyncio, ya incluido con Streamlit) que mantiene en
+memoria una sola copia del dataset, su índice de filtros, los resúmenes sumables y un
+:class:`cache.ResultCache` para todas las solicitudes. Los cálculos corren en un pool de
+hilos y la espera de la red en el bucle de eventos, así que atiende muchas solicitudes
+simultáneas sin una sesión de Streamlit por cliente. No hace ninguna llamada externa.
+
+Los filtros van en la query string con los nombres de columna, repetidos o separados
+por comas (``school=GP&sex=F,M``), y la edad también como rango (``age_min``/``age_max``).
+Las columnas yes/no usan ``yes``/``no``. Endpoints (todos ``GET``):
+
+* ``/health`` y ``/filters`` (columnas filtrables y sus valores),
+* ``/count``, ``/describe``,
+* ``/aggregate?by=school&by=sex&measure=G3`` (conteo, media, varianza y desviación),
+* ``/correlation?method=pearson|spearman``,
+* ``/risk?top=50`` (estudiantes con mayor probabilidad de reprobar),
+* ``/export?format=csv|csv.gz|parquet`` (la selección, transmitida por bloques).
+
+Las llaves de caché coinciden con las de las entradas del dashboard, así que con el
+mismo ``RESULT_CACHE_DIR`` ambos comparten el nivel en disco.
+
+Uso (pruebas contra localhost en ``test_api.py``)::
+
+    python api.py --port 8600
+    curl "http://127.0.0.1:8600/aggregate?by=school&by=sex&age_min=15&age_max=18"
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+from cache import ResultCache
+from correlation import MomentStats, spearman_matrix
+from cube import grouped_aggregate
+from export import FORMATS, export_rows, iter_chunks, iter_csv
+from filters import FilterIndex, FilterState, age_values
+from ingest import Summaries
+from instrument import span
+from loader import dataset_version, load_dataset
+from risk import RANK_TOP, RiskModel, rank
+from schema import CATEGORIES, COLUMNS, GRADES, YES_NO, YES_NO_LABELS
+
+DEFAULT_HOST = os.environ.get("API_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("API_PORT", 8600))
+# Cada cuántos segundos se revisa si cambió la versión de los datos.
+RELOAD_INTERVAL = float(os.environ.get("API_RELOAD_INTERVAL", 5))
+# Columnas filtrables: las de la barra lateral más el resto de categóricas, yes/no y escalas.
+API_FILTER_COLUMNS = list(CATEGORIES) + YES_NO + [
+    "age", "Medu", "Fedu", "traveltime", "studytime", "failures",
+]
+GROUP_COLUMNS = [column for column in COLUMNS if column not in ("absences", *GRADES)]
+EXPORT_BLOCK = 1 << 20
+
+
+class BadRequest(ValueError):
+    """Parámetros inválidos en la solicitud."""
+
+
+@dataclass
+class Snapshot:
+    """Dataset de una versión con sus estructuras derivadas."""
+
+    data: pd.DataFrame
+    index: FilterIndex
+    summaries: Summaries
+    version: str
+
+
+class SharedData:
+    """Dataset compartido por todas las solicitudes; se recarga cuando cambia la versión
+    (un lote agregado con ``ingest.append`` se procesa de forma incremental)."""
+
+    def __init__(self, source=None, cache_dir=None, reload_interval=RELOAD_INTERVAL):
+        self.source = source
+        self.cache_dir = cache_dir
+        self.reload_interval = reload_interval
+        self._snapshot = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        if self._snapshot is not None and time.monotonic() - self._checked < self.reload_interval:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked >= self.reload_interval:
+                version = dataset_version(self.source, self.cache_dir)
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._snapshot = self._load(self._snapshot)
+                self._checked = time.monotonic()
+            return self._snapshot
+
+    def _load(self, previous):
+        with span("api:load_data"):
+            data = load_dataset(self.source, self.cache_dir)
+            summaries = Summaries.for_frame(data, previous.summaries if previous else None)
+            return Snapshot(data, FilterIndex(data, API_FILTER_COLUMNS), summaries, data.attrs["version"])
+
+
+def _parse_value(column, text, lookup):
+    if text not in lookup:
+        raise BadRequest(f"{column}: valor {text!r} desconocido (usa {', '.join(lookup)})")
+    return lookup[text]
+
+
+def _label(value):
+    return YES_NO_LABELS[value] if isinstance(value, bool) else value
+
+
+def parse_state(index, arguments):
+    """:class:`FilterState` a partir de los argumentos de la query string (``{nombre: [bytes]}``)."""
+    mapping = {}
+    for name, raw in arguments.items():
+        if name in ("age_min", "age_max") or name not in index.columns:
+            continue
+        lookup = {str(_label(value)): value for value in index.values(name)}
+        texts = [part.strip() for item in raw for part in item.decode().split(",") if part.strip()]
+        mapping[name] = [_parse_value(name, text, lookup) for text in texts]
+    if "age_min" in arguments or "age_max" in arguments:
+        ages = index.values("age")
+        try:
+            low = int(arguments.get("age_min", [min(ages)])[-1])
+            high = int(arguments.get("age_max", [max(ages)])[-1])
+        except ValueError:
+            raise BadRequest("age_min y age_max deben ser enteros") from None
+        selected = set(age_values((low, high)))
+        if "age" in mapping:
+            selected &= set(mapping["age"])
+        mapping["age"] = sorted(selected)
+    return index.normalize(mapping)
+
+
+def _records(frame):
+    """Filas de ``frame`` (con su índice como columnas) listas para JSON."""
+    frame = frame.reset_index() if not isinstance(frame.index, pd.RangeIndex) else frame
+    return [
+        {str(key): _json_value(value) for key, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class Queries:
+    """Consultas del API sobre una instantánea, cacheadas por ``(versión, filtros, nombre)``."""
+
+    def __init__(self, shared, cache):
+        self.shared = shared
+        self.cache = cache
+
+    def _cached(self, snap, state, name, compute):
+        with span(f"api:{name[0] if isinstance(name, tuple) else name}") as record:
+            def traced():
+                record.attrs["cache_hit"] = False
+                return compute()
+
+            record.attrs["cache_hit"] = True
+            return self.cache.get_or_compute((snap.version, state, name), traced)
+
+    def filtered(self, snap, state):
+        return snap.index.select(snap.data, state)
+
+    def count(self, snap, state):
+        return self._cached(snap, state, "filtered_count", lambda: snap.index.count(state))
+
+    def describe(self, snap, state):
+        return self._cached(snap, state, "describe", lambda: self.filtered(snap, state).describe())
+
+    def aggregate(self, snap, state, by, measure):
+        by = list(by)
+        unknown = [column for column in by if column not in GROUP_COLUMNS]
+        if not by or unknown:
+            raise BadRequest(f"by debe ser una o más de: {', '.join(GROUP_COLUMNS)}")
+        if measure not in (*GRADES, "absences"):
+            raise BadRequest(f"measure debe ser una de: {', '.join([*GRADES, 'absences'])}")
+        return self._cached(
+            snap, state, ("aggregate", tuple(by), measure),
+            lambda: grouped_aggregate(
+                snap.summaries.cube, lambda: self.filtered(snap, state), state, by, measure
+            ),
+        )
+
+    def moments(self, snap, state):
+        def compute():
+            if snap.summaries.moments.covers(state):
+                return snap.summaries.moments.stats(state)
+            return MomentStats.from_frame(self.filtered(snap, state))
+        return self._cached(snap, state, "moments", compute)
+
+    def correlation(self, snap, state, method):
+        if method == "pearson":
+            return self._cached(snap, state, "pearson", lambda: self.moments(snap, state).pearson())
+        if method == "spearman":
+            return self._cached(snap, state, "spearman", lambda: spearman_matrix(self.filtered(snap, state)))
+        raise BadRequest("method debe ser pearson o spearman")
+
+    def risk_model(self, snap):
+        state = FilterState()
+        return self._cached(
+            snap, state, "risk_model",
+            lambda: RiskModel.fit(snap.data, snap.summaries.moments.stats(state)),
+        )
+
+    def risk(self, snap, state):
+        def compute():
+            filtered = self.filtered(snap, state)
+            return rank(filtered, self.risk_model(snap).score(filtered))
+        return self._cached(snap, state, "risk_ranking", compute)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, queries, executor):
+        self.queries = queries
+        self.executor = executor
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def snapshot_and_state(self):
+        snap = await self.run(self.queries.shared.current)
+        try:
+            state = parse_state(snap.index, self.request.query_arguments)
+        except BadRequest as exc:
+            raise tornado.web.HTTPError(400, str(exc)) from None
+        return snap, state
+
+    async def query(self, method, *args):
+        try:
+            return await self.run(method, *args)
+        except BadRequest as exc:
+            raise tornado.web.HTTPError(400, str(exc)) from None
+
+    def send(self, snap, state, payload):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        body = {"version": snap.version, "filters": {
+            column: [_label(value) for value in values] for column, values in state.selections
+        }}
+        body.update(payload)
+        self.finish(json.dumps(body, ensure_ascii=False, allow_nan=False))
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get("exc_info", (None, None))[1]
+        message = getattr(error, "log_message", None) or self._reason
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"error": message, "status": status_code}, ensure_ascii=False))
+
+
+class HealthHandler(BaseHandler):
+    async def get(self):
+        snap = await self.run(self.queries.shared.current)
+        self.finish({"status": "ok", "version": snap.version, "rows": len(snap.data),
+                     "cache": self.queries.cache.stats()})
+
+
+class FiltersHandler(BaseHandler):
+    async def get(self):
+        snap = await self.run(self.queries.shared.current)
+        self.finish({column: [_label(value) for value in snap.index.values(column)]
+                     for column in snap.index.columns})
+
+
+class CountHandler(BaseHandler):
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        count = await self.query(self.queries.count, snap, state)
+        self.send(snap, state, {"count": count, "total": len(snap.data)})
+
+
+class DescribeHandler(BaseHandler):
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        describe = await self.query(self.queries.describe, snap, state)
+        self.send(snap, state, {"describe": _records(describe.rename_axis("statistic"))})
+
+
+class AggregateHandler(BaseHandler):
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        by = [part for item in self.get_arguments("by") for part in item.split(",") if part]
+        measure = self.get_argument("measure", "G3")
+        result = await self.query(self.queries.aggregate, snap, state, by, measure)
+        rows = _records(result)
+        for row in rows:
+            for column in by:
+                row[column] = _label(row[column])
+        self.send(snap, state, {"by": by, "measure": measure, "rows": rows})
+
+
+class CorrelationHandler(BaseHandler):
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        method = self.get_argument("method", "pearson").lower()
+        matrix = await self.query(self.queries.correlation, snap, state, method)
+        self.send(snap, state, {
+            "method": method,
+            "columns": list(matrix.columns),
+            "matrix": [[_json_value(value) for value in row] for row in matrix.to_numpy()],
+        })
+
+
+class RiskHandler(BaseHandler):
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        try:
+            top = int(self.get_argument("top", 50))
+        except ValueError:
+            raise tornado.web.HTTPError(400, "top debe ser un entero") from None
+        if not 1 <= top <= RANK_TOP:
+            raise tornado.web.HTTPError(400, f"top debe estar entre 1 y {RANK_TOP}")
+        ranking = await self.query(self.queries.risk, snap, state)
+        ranking = ranking.head(top).rename_axis("row").reset_index()
+        for column in YES_NO:
+            ranking[column] = ranking[column].map(YES_NO_LABELS)
+        self.send(snap, state, {"students": _records(ranking)})
+
+
+class ExportHandler(BaseHandler):
+    """Transmite la selección por bloques; la memoria no depende del tamaño de la selección."""
+
+    async def get(self):
+        snap, state = await self.snapshot_and_state()
+        fmt = self.get_argument("format", "csv")
+        if fmt not in FORMATS:
+            raise tornado.web.HTTPError(400, f"format debe ser uno de: {', '.join(FORMATS)}")
+        extension, mime = FORMATS[fmt]
+        self.set_header("Content-Type", mime)
+        self.set_header("Content-Disposition", f'attachment; filename="estudiantes{extension}"')
+        try:
+            if fmt == "parquet":
+                await self._send_parquet(snap, state)
+            else:
+                await self._send_csv(snap, state, compress=fmt == "csv.gz")
+        except StreamClosedError:
+            return
+        self.finish()
+
+    async def _send_csv(self, snap, state, compress):
+        blocks = iter_csv(iter_chunks(snap.data, snap.index, state))
+        # wbits=31: formato gzip.
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def next_block():
+            data = next(blocks, None)
+            if compressor is None:
+                return data, data is None
+            if data is None:
+                return compressor.flush(), True
+            return compressor.compress(data), False
+
+        done = False
+        while not done:
+            data, done = await self.run(next_block)
+            if data:
+                self.write(data)
+                await self.flush()
+
+    async def _send_parquet(self, snap, state):
+        # Parquet escribe sus metadatos al final: se arma en un archivo temporal y se transmite.
+        path = await self.run(export_rows, snap.data, snap.index, state, "parquet")
+        try:
+            with open(path, "rb") as fh:
+                while block := await self.run(fh.read, EXPORT_BLOCK):
+                    self.write(block)
+                    await self.flush()
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def make_app(shared=None, cache=None, workers=None):
+    """Aplicación Tornado con todos los endpoints sobre un dataset y un caché compartidos."""
+    queries = Queries(shared or SharedData(), cache if cache is not None else ResultCache())
+    executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4, thread_name_prefix="api")
+    settings = {"queries": queries, "executor": executor}
+    return tornado.web.Application([
+        (r"/health", HealthHandler, settings),
+        (r"/filters", FiltersHandler, settings),
+        (r"/count", CountHandler, settings),
+        (r"/describe", DescribeHandler, settings),
+        (r"/aggregate", AggregateHandler, settings),
+        (r"/correlation", CorrelationHandler, settings),
+        (r"/risk", RiskHandler, settings),
+        (r"/export", ExportHandler, settings),
+    ])
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, source=None):
+    shared = SharedData(source)
+    app = make_app(shared, workers=workers)
+    # Carga el dataset antes de aceptar conexiones.
+    await asyncio.get_running_loop().run_in_executor(None, shared.current)
+    server = app.listen(port, address=host)
+    print(f"API en http://{host}:{port} ({len(shared.current().data)} filas)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON local con los agregados del dashboard.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, help="hilos de cálculo (por defecto, uno por núcleo)")
+    parser.add_argument("--source", help="archivo, directorio, patrón glob o URL de los datos")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.source))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,27 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+from aggregations import grade_summary, grade_table
+from cache import ResultCache
+from charts import label_bars, new_figure, render as render_chart, scatter
+from correlation import MomentStats, spearman_matrix
+from cube import grouped_mean
+from export import FORMATS as EXPORT_FORMATS, export_chunks, export_rows, table_bytes
+from regression import fit_line, fit_multiple
+from filters import FilterIndex, FilterState, age_values
+from ingest import Summaries
+from instrument import EXPORT_DIR, span, tracer
+from loader import dataset_version, load_dataset
+from panels import PanelContext, PanelRegistry
+from quantiles import GroupedHistogram, box_stats
+from risk import FEATURES as RISK_FEATURES, RANK_TOP, TARGET as RISK_TARGET, RiskModel, band_counts, rank
+from schema import GRADES, NUMERIC, YES_NO_LABELS
+import sqlquery
+import store
+
 # Configuración de la página
 st.set_page_config(
     page_title="Visualización de Datos Estudiantiles",
@@ -10,13 +29,42 @@ st.set_page_config(
     layout="wide",
 )
 
-# Cargar datos
-@st.cache
-def load_data():
-    url = "https://raw.githubusercontent.com/Mateo-Gutierrez/Proyecto-Toma1/d3bb98b70dad9e7b2159634afb18c0e0476681e1/student-por.csv"
-    return pd.read_csv(url, delimiter=";")
-
-data = load_data()
+# Medición del rerun completo y de cada tramo caliente (carga, filtros, entradas,
+# gráficos y paneles); se consulta en el panel de administración de la barra lateral.
+rerun_span = tracer.start("rerun", root=True)
+
+# Con STUDENT_BACKEND=sqlite el dashboard consulta el almacén SQLite (filtros, conteos,
+# agregados y solo las filas de la selección) y no carga el dataset en memoria.
+BACKEND = os.environ.get("STUDENT_BACKEND", "memory")
+
+# Cargar datos (caché columnar local, compartido entre sesiones). La versión se
+# consulta en cada rerun: un lote agregado con ingest.append la cambia y con ella
+# todos los cachés que dependen de los datos.
+@st.cache_resource(max_entries=2)
+def load_data(version):
+    return load_dataset()
+
+# El almacén se llena con `python ingest.py --db ...`; si quedó en otra versión, se
+# sincroniza aquí una vez (solo con las filas nuevas si es un lote agregado).
+@st.cache_resource(max_entries=2)
+def load_store(version):
+    pool = store.open_store()
+    with pool.connection() as conn:
+        current = store.stored_version(conn)
+    if current != version:
+        with pool.writer() as conn:
+            store.sync_frame(conn, load_dataset())
+    return pool
+
+version = dataset_version()
+if BACKEND == "sqlite":
+    data = None
+    with span("store"):
+        store_pool = load_store(version)
+else:
+    with span("load_data"):
+        data = load_data(version)
+    version = data.attrs["version"]
 
 st.title("🎓 Dashboard de análisis estudiantil")
 st.markdown(
@@ -32,18 +80,86 @@ st.markdown(
         """
     )
 
+# Índice de bitmaps para los filtros (se construye una vez por versión de datos); con
+# SQLite, los valores y conteos de los filtros salen del almacén.
+@st.cache_resource(max_entries=2)
+def load_filter_index(_data, version):
+    if BACKEND == "sqlite":
+        return sqlquery.StoreIndex(store_pool)
+    return FilterIndex(_data)
+
+with span("filter_index"):
+    filter_index = load_filter_index(data, version)
+
+# Resúmenes sumables: cubo preagregado para tablas y gráficos agrupados, momentos
+# por celda para la correlación e histogramas por grupo para los diagramas de caja.
+# Al cambiar la versión por un lote agregado solo se procesan las filas nuevas.
+@st.cache_resource
+def latest_summaries():
+    return {}
+
+@st.cache_resource(max_entries=2)
+def load_summaries(_data, version):
+    latest = latest_summaries()
+    summaries = Summaries.for_frame(_data, latest.get("summaries"))
+    latest["summaries"] = summaries
+    return summaries
+
+if BACKEND == "sqlite":
+    cube = moments = histograms = None
+else:
+    with span("summaries"):
+        summaries = load_summaries(data, version)
+    cube = summaries.cube
+    moments = summaries.moments
+    histograms = summaries.histograms
+
+# Modelo de riesgo (nota esperada y probabilidad de reprobar): se ajusta la primera
+# vez que se abre la sección de riesgo y de nuevo solo cuando cambia la versión de datos.
+@st.cache_resource(max_entries=2)
+def load_risk_model(_data, version):
+    if BACKEND == "sqlite":
+        everyone = FilterState()
+        with store_pool.connection() as conn:
+            frame = sqlquery.students(conn, everyone, RISK_FEATURES + [RISK_TARGET])
+            frame.attrs["version"] = version
+            return RiskModel.fit(frame, sqlquery.moments(conn, everyone))
+    return RiskModel.fit(_data, moments.stats(FilterState()))
+
 # Sidebar para filtros
 st.sidebar.title("📊 Filtros")
 selected_school = st.sidebar.multiselect(
-    "Selecciona el colegio", options=data["school"].unique(), default=data["school"].unique()
+    "Selecciona el colegio", options=filter_index.values("school"), default=filter_index.values("school"),
+    key="filtro_school"
 )
 selected_sex = st.sidebar.multiselect(
-    "Selecciona el sexo", options=data["sex"].unique(), default=data["sex"].unique()
+    "Selecciona el sexo", options=filter_index.values("sex"), default=filter_index.values("sex"),
+    key="filtro_sex"
 )
 selected_age_range = st.sidebar.slider(
-    "Selecciona rango de edad", int(data["age"].min()), int(data["age"].max()), (15, 20)
+    "Selecciona rango de edad", min(filter_index.values("age")), max(filter_index.values("age")), (15, 20),
+    key="filtro_age"
 )
 
+# Filtros adicionales
+with st.sidebar.expander("Más filtros", expanded=False):
+    selected_address = st.multiselect(
+        "Tipo de dirección", options=filter_index.values("address"), default=filter_index.values("address"),
+        key="filtro_address"
+    )
+    selected_mjob = st.multiselect(
+        "Trabajo de la madre", options=filter_index.values("Mjob"), default=filter_index.values("Mjob"),
+        key="filtro_Mjob"
+    )
+    selected_internet = st.multiselect(
+        "Acceso a internet", options=filter_index.values("internet"), default=filter_index.values("internet"),
+        format_func=YES_NO_LABELS.get, key="filtro_internet"
+    )
+    selected_failures = st.multiselect(
+        "Materias reprobadas", options=filter_index.values("failures"), default=filter_index.values("failures"),
+        key="filtro_failures"
+    )
+
 # Texto aclaratorio
 st.sidebar.markdown(
     """
@@ -53,21 +169,206 @@ st.sidebar.markdown(
 )
 
 # Aplicar filtros
-filtered_data = data[
-    (data["school"].isin(selected_school)) &
-    (data["sex"].isin(selected_sex)) &
-    (data["age"].between(*selected_age_range))
-]
+with span("filter_state"):
+    filter_state = filter_index.normalize({
+        "school": selected_school,
+        "sex": selected_sex,
+        "age": age_values(selected_age_range),
+        "address": selected_address,
+        "Mjob": selected_mjob,
+        "internet": selected_internet,
+        "failures": selected_failures,
+    })
+
+# Descargas: la selección filtrada se escribe por bloques (desde el bitmap del índice)
+# en un archivo temporal comprimido que se entrega tal cual, sin copiar el DataFrame ni
+# armar el CSV completo en memoria. Las tablas agregadas se descargan desde cada panel.
+DOWNLOAD_FORMATS = {"CSV": ("csv", "csv.gz"), "Parquet": ("parquet", "parquet")}  # (tablas, datos)
+
+with st.sidebar.expander("⬇️ Descargas", expanded=False):
+    formato_descarga = st.radio("Formato", list(DOWNLOAD_FORMATS), horizontal=True, key="descarga_formato")
+    data_format = DOWNLOAD_FORMATS[formato_descarga][1]
+    export_key = (version, filter_state, data_format)
+    prepared = st.session_state.get("descarga_archivo")
+    if prepared is not None and (prepared[0] != export_key or not prepared[1].exists()):
+        prepared[1].unlink(missing_ok=True)
+        prepared = st.session_state["descarga_archivo"] = None
+    if st.button(f"Preparar datos filtrados ({filter_index.count(filter_state):,} filas)", key="descarga_preparar"):
+        with span("export", format=data_format):
+            if BACKEND == "sqlite":
+                with store_pool.connection() as conn:
+                    path = export_chunks(sqlquery.iter_students(conn, filter_state), data_format)
+            else:
+                path = export_rows(data, filter_index, filter_state, data_format)
+        prepared = st.session_state["descarga_archivo"] = (export_key, path)
+    if prepared is not None:
+        extension, mime = EXPORT_FORMATS[data_format]
+        with open(prepared[1], "rb") as fh:
+            st.download_button(
+                "Descargar datos filtrados", fh, file_name=f"estudiantes{extension}", mime=mime,
+                key="descarga_datos"
+            )
+
+# Caché de resultados del proceso (entradas de los paneles e imágenes de gráficos),
+# compartido entre sesiones y reruns, acotado por bytes y con TTL.
+@st.cache_resource
+def load_result_cache():
+    return ResultCache()
+
+result_cache = load_result_cache()
+
+# Registro de secciones y paneles: cada panel se calcula solo cuando se abre.
+registry = PanelRegistry(memo=result_cache)
+context = PanelContext(registry, version, filter_state)
+
+# Filas de la selección: solo las usan los gráficos de dispersión y el riesgo (con
+# SQLite el resto de las entradas son agregados calculados por la base).
+@registry.input("filtered_data", cache=False)
+def input_filtered_data(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.students(conn, ctx.state)
+    return filter_index.select(data, ctx.state)
+
+@registry.input("filtered_count")
+def input_filtered_count(ctx):
+    return filter_index.count(ctx.state)
+
+@registry.input("describe")
+def input_describe(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.describe(conn, ctx.state)
+    return ctx.get("filtered_data").describe()
+
+@registry.input("sex_age_summary")
+def input_sex_age_summary(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.grade_summary(conn, ctx.state, ["sex", "age"])
+    return grade_summary(ctx.get("filtered_data"), ["sex", "age"])
+
+@registry.input("school_counts")
+def input_school_counts(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.aggregate(conn, ctx.state, "school")["count"]
+    if cube.covers(ctx.state):
+        return cube.aggregate(ctx.state, "school")["count"]
+    return ctx.get("filtered_data")["school"].value_counts()
+
+def input_g3_mean(by):
+    if BACKEND == "sqlite":
+        def sql_mean(ctx):
+            with store_pool.connection() as conn:
+                return sqlquery.mean(conn, ctx.state, by)
+        return sql_mean
+    return lambda ctx: grouped_mean(cube, lambda: ctx.get("filtered_data"), ctx.state, by)
+
+registry.input("g3_school_sex")(input_g3_mean(["school", "sex"]))
+registry.input("g3_age_sex")(input_g3_mean(["age", "sex"]))
+registry.input("g3_schoolsup")(input_g3_mean("schoolsup"))
+registry.input("g3_famsup")(input_g3_mean("famsup"))
+
+def group_histograms(ctx, column):
+    """Histogramas de ``column`` que respetan los filtros de la barra lateral."""
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.histogram(conn, ctx.state, column, ["internet", "schoolsup"]), None
+    histogram = histograms[column]
+    if histogram.covers(ctx.state):
+        return histogram, ctx.state
+    return GroupedHistogram.from_frame(ctx.get("filtered_data"), column), None
+
+@registry.input("g3_internet_box")
+def input_g3_internet_box(ctx):
+    histogram, state = group_histograms(ctx, "G3")
+    return [
+        box_stats(histogram.values, histogram.histogram(state, internet=value), label=YES_NO_LABELS[value])
+        for value in [False, True]
+    ]
+
+@registry.input("studytime_internet_schoolsup_box")
+def input_studytime_internet_schoolsup_box(ctx):
+    histogram, state = group_histograms(ctx, "studytime")
+    return [
+        box_stats(histogram.values, histogram.histogram(state, internet=internet_value, schoolsup=schoolsup_value))
+        for internet_value in [False, True]
+        for schoolsup_value in [False, True]
+    ]
+
+@registry.input("moments")
+def input_moments(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.moments(conn, ctx.state)
+    if moments.covers(ctx.state):
+        return moments.stats(ctx.state)
+    return MomentStats.from_frame(ctx.get("filtered_data"))
+
+@registry.input("pearson")
+def input_pearson(ctx):
+    return ctx.get("moments").pearson()
+
+@registry.input("fits_studytime")
+def input_fits_studytime(ctx):
+    return {grade: fit_line(ctx.get("moments"), "studytime", grade) for grade in GRADES}
+
+@registry.input("fit_absences_g3")
+def input_fit_absences_g3(ctx):
+    return fit_line(ctx.get("moments"), "absences", "G3")
+
+@registry.input("spearman")
+def input_spearman(ctx):
+    if BACKEND == "sqlite":
+        with store_pool.connection() as conn:
+            return sqlquery.spearman(conn, ctx.state)
+    return spearman_matrix(ctx.get("filtered_data"))
+
+@registry.input("risk_model", cache=False)
+def input_risk_model(ctx):
+    return load_risk_model(data, version)
+
+@registry.input("risk_scores", cache=False)
+def input_risk_scores(ctx):
+    return ctx.get("risk_model").score(ctx.get("filtered_data"))
+
+@registry.input("risk_ranking")
+def input_risk_ranking(ctx):
+    return rank(ctx.get("filtered_data"), ctx.get("risk_scores"))
+
+@registry.input("risk_bands")
+def input_risk_bands(ctx):
+    return band_counts(ctx.get("risk_scores"))
+
+# Gráficos renderizados una vez por (versión de datos, filtros, gráfico)
+def show_chart(chart_id, draw):
+    with span(f"chart:{chart_id}", cache_hit=True) as record:
+        def traced_draw():
+            record.attrs["cache_hit"] = False
+            return draw()
+
+        image = render_chart(result_cache, chart_id, (version, filter_state), traced_draw)
+        st.image(image)
+
+def download_table(frame, name):
+    """Botón de descarga de una tabla agregada en el formato elegido en la barra lateral."""
+    fmt = DOWNLOAD_FORMATS[formato_descarga][0]
+    extension, mime = EXPORT_FORMATS[fmt]
+    st.download_button(
+        f"⬇️ {name}{extension}", table_bytes(frame, fmt), file_name=f"{name}{extension}", mime=mime,
+        key=f"descarga_{name}"
+    )
 
 # Índice interactivo
-secciones = [
-    "📘 Información del Dataset",
-    "📈 Estadísticas Generales",
-    "📊 Visualizaciones Interactivas",
-    "📉 Visualización de correlación",
-    "✅ Resultados",
-    "🧐 Conclusiones"
-]
+INFORMACION = "📘 Información del Dataset"
+ESTADISTICAS = "📈 Estadísticas Generales"
+VISUALIZACIONES = "📊 Visualizaciones Interactivas"
+CORRELACION = "📉 Visualización de correlación"
+RIESGO = "🚨 Riesgo"
+RESULTADOS = "✅ Resultados"
+CONCLUSIONES = "🧐 Conclusiones"
+secciones = [INFORMACION, ESTADISTICAS, VISUALIZACIONES, CORRELACION, RIESGO, RESULTADOS, CONCLUSIONES]
 # Estilizar el texto de la radio con Markdown
 st.markdown(
     """
@@ -85,9 +386,11 @@ st.markdown(
 st.markdown('<p class="big-font">Navega por las secciones:</p>', unsafe_allow_html=True)
 
 # Radio con opciones
-seleccion = st.radio("", secciones)
+seleccion = st.radio("", secciones, key="seccion")
+
 
-if seleccion == "📘 Información del Dataset":
+@registry.section(INFORMACION)
+def section_information():
     st.title("📘 Información del Dataset")
     st.markdown(
         """
@@ -103,81 +406,98 @@ if seleccion == "📘 Información del Dataset":
         """
     )
 
-elif seleccion == "📈 Estadísticas Generales":
+
+@registry.section(ESTADISTICAS)
+def section_statistics():
     st.header("📈 Estadísticas Generales")
     st.markdown(
         """
         Este conjunto de datos incluye características como edad, género, tiempo de estudio, apoyo educativo, y notas de los estudiantes.
         """
     )
-    
-    # Expander para registros filtrados
-    with st.expander("📋 Registros Filtrados y Estadísticas Generales", expanded=False):
-        st.write(f"**Total de registros filtrados:** {len(filtered_data)}")
-        st.dataframe(filtered_data.describe())
-    
-    # Expander para descripciones de grupos
-    with st.expander("📘 Descripción y Análisis Segmentado por Grupos", expanded=False):
-        st.markdown(
-            """
-            <div style="text-align: center; font-size: 18px; font-weight: bold;">
-                <p> <strong>Descripción de los Grupos:</strong></p>
-            <div style="text-align: left; font-size: 18px; font-weight: bold;">
-                <p><strong>G1:</strong> Nota obtenida en el primer periodo académico.</p>
-                <p><strong>G2:</strong> Nota obtenida en el segundo periodo académico.</p>
-                <p><strong>G3:</strong> Nota final obtenida al finalizar el año.</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
 
-        # Dividir en columnas para mostrar tablas lado a lado
-        col1, col2, col3 = st.columns(3)
 
-        # Tabla para G1
-        with col1:
-            st.subheader("Promedio G1 por Sexo y Edad")
-            group_g1 = filtered_data.groupby(["sex", "age"])["G1"].mean().reset_index()
-            st.dataframe(group_g1.style.format({"G1": "{:.2f}"}))
+# Expander para registros filtrados
+@registry.panel(ESTADISTICAS, "📋 Registros Filtrados y Estadísticas Generales", inputs=["filtered_count", "describe"])
+def panel_filtered_records(filtered_count, describe):
+    st.write(f"**Total de registros filtrados:** {filtered_count}")
+    st.dataframe(describe)
+    download_table(describe.rename_axis("estadistico"), "resumen")
 
-        # Tabla para G2
-        with col2:
-            st.subheader("Promedio G2 por Sexo y Edad")
-            group_g2 = filtered_data.groupby(["sex", "age"])["G2"].mean().reset_index()
-            st.dataframe(group_g2.style.format({"G2": "{:.2f}"}))
 
-        # Tabla para G3
-        with col3:
-            st.subheader("Promedio G3 por Sexo y Edad")
-            group_g3 = filtered_data.groupby(["sex", "age"])["G3"].mean().reset_index()
-            st.dataframe(group_g3.style.format({"G3": "{:.2f}"}))
+# Expander para descripciones de grupos
+@registry.panel(ESTADISTICAS, "📘 Descripción y Análisis Segmentado por Grupos", inputs=["sex_age_summary"])
+def panel_segmented_groups(summary):
+    st.markdown(
+        """
+        <div style="text-align: center; font-size: 18px; font-weight: bold;">
+            <p> <strong>Descripción de los Grupos:</strong></p>
+        <div style="text-align: left; font-size: 18px; font-weight: bold;">
+            <p><strong>G1:</strong> Nota obtenida en el primer periodo académico.</p>
+            <p><strong>G2:</strong> Nota obtenida en el segundo periodo académico.</p>
+            <p><strong>G3:</strong> Nota final obtenida al finalizar el año.</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # Una sola pasada agrupada alimenta las tres tablas
+    table_format = {"mean": "{:.2f}", "std": "{:.2f}"}
+
+    # Dividir en columnas para mostrar tablas lado a lado
+    col1, col2, col3 = st.columns(3)
+
+    # Tabla para G1
+    with col1:
+        st.subheader("Promedio G1 por Sexo y Edad")
+        group_g1 = grade_table(summary, "G1")
+        st.dataframe(group_g1.style.format({**table_format, "G1": "{:.2f}"}))
+        download_table(group_g1, "promedio_g1_sexo_edad")
 
-elif seleccion == "📊 Visualizaciones Interactivas":
+    # Tabla para G2
+    with col2:
+        st.subheader("Promedio G2 por Sexo y Edad")
+        group_g2 = grade_table(summary, "G2")
+        st.dataframe(group_g2.style.format({**table_format, "G2": "{:.2f}"}))
+        download_table(group_g2, "promedio_g2_sexo_edad")
+
+    # Tabla para G3
+    with col3:
+        st.subheader("Promedio G3 por Sexo y Edad")
+        group_g3 = grade_table(summary, "G3")
+        st.dataframe(group_g3.style.format({**table_format, "G3": "{:.2f}"}))
+        download_table(group_g3, "promedio_g3_sexo_edad")
+
+
+@registry.section(VISUALIZACIONES)
+def section_visualizations():
     st.header("📊 Visualizaciones Interactivas")
 
-    # Distribución por colegio
-    with st.expander("Distribución de Estudiantes por Colegio", expanded=False):
-        st.subheader("Distribución de Estudiantes por Colegio")
-        st.markdown(
-            """
-            Este gráfico muestra cómo se distribuyen los estudiantes entre los dos colegios del dataset: 
-            **Gabriel Pereira (GP)** y **Mousinho da Silveira (MS)**. 
-            La visualización resalta la proporción de estudiantes en cada colegio, lo que puede ayudar a entender la composición del dataset.
-            """
-        )
 
-        # Recuento de estudiantes por colegio
-        school_counts = filtered_data["school"].value_counts()
-        st.markdown(
-            f"""
-            **Recuento por Colegio:**
-            - **Gabriel Pereira (GP):** {school_counts.get('GP', 0)} estudiantes
-            - **Mousinho da Silveira (MS):** {school_counts.get('MS', 0)} estudiantes
-            """
-        )
-        
-        # Gráfico circular
-        fig, ax = plt.subplots(figsize=(8, 6))
+# Distribución por colegio
+@registry.panel(VISUALIZACIONES, "Distribución de Estudiantes por Colegio", inputs=["school_counts"])
+def panel_school_distribution(school_counts):
+    st.subheader("Distribución de Estudiantes por Colegio")
+    st.markdown(
+        """
+        Este gráfico muestra cómo se distribuyen los estudiantes entre los dos colegios del dataset: 
+        **Gabriel Pereira (GP)** y **Mousinho da Silveira (MS)**. 
+        La visualización resalta la proporción de estudiantes en cada colegio, lo que puede ayudar a entender la composición del dataset.
+        """
+    )
+
+    # Recuento de estudiantes por colegio
+    st.markdown(
+        f"""
+        **Recuento por Colegio:**
+        - **Gabriel Pereira (GP):** {school_counts.get('GP', 0)} estudiantes
+        - **Mousinho da Silveira (MS):** {school_counts.get('MS', 0)} estudiantes
+        """
+    )
+    
+    # Gráfico circular
+    def draw_school_pie():
+        fig, ax = new_figure("bar")
         ax.pie(
             school_counts,
             labels=school_counts.index,
@@ -186,132 +506,141 @@ elif seleccion == "📊 Visualizaciones Interactivas":
             colors=["#FFD700", "#6495ED"]
         )
         ax.set_title("Distribución de Estudiantes por Colegio", fontsize=14, color="navy")
-        st.pyplot(fig)
-
-    # Relación entre sexo y notas
-    with st.expander("Relación entre Sexo y Nota Final (G3) por Colegio", expanded=False):
-        st.subheader("Relación entre Sexo y Nota Final (G3) por Colegio")
-        st.markdown(
-        """
-        En esta gráfica se analiza cómo las notas finales (G3) varían según el sexo del estudiante 
-        (**Femenino** o **Masculino**) y su colegio. Esta comparación permite identificar posibles diferencias 
-        en el rendimiento académico por género en ambos colegios.
-        """
-    )
+        return fig
+    show_chart("school_pie", draw_school_pie)
+    download_table(school_counts, "estudiantes_por_colegio")
+
+# Relación entre sexo y notas
+@registry.panel(VISUALIZACIONES, "Relación entre Sexo y Nota Final (G3) por Colegio", inputs=["g3_school_sex"])
+def panel_g3_school_sex(g3_school_sex):
+    st.subheader("Relación entre Sexo y Nota Final (G3) por Colegio")
+    st.markdown(
+    """
+    En esta gráfica se analiza cómo las notas finales (G3) varían según el sexo del estudiante 
+    (**Femenino** o **Masculino**) y su colegio. Esta comparación permite identificar posibles diferencias 
+    en el rendimiento académico por género en ambos colegios.
+    """
+)
 
-        # Gráfico de la relación entre sexo y notas finales (G3) por colegio
-        fig, ax = plt.subplots(figsize=(10, 6))
-        grouped_data = filtered_data.groupby(["school", "sex"])["G3"].mean().unstack()
+    # Gráfico de la relación entre sexo y notas finales (G3) por colegio
+    def draw_g3_school_sex():
+        fig, ax = new_figure("wide")
+        grouped_data = g3_school_sex.unstack()
         grouped_data.plot(kind="bar", ax=ax, color=["#FF6347", "#4682B4"])
+        label_bars(ax)
         ax.set_title("Relación entre Sexo y Nota Final (G3) por Colegio", fontsize=14, color="navy")
         ax.set_xlabel("Colegio", fontsize=12)
         ax.set_ylabel("Nota Promedio (G3)", fontsize=12)
-        st.pyplot(fig)
-
-    # Nota final por edad y sexo
-    with st.expander("Nota Final (G3) por Edad y Sexo", expanded=False):
-        st.subheader("Nota Final (G3) por Edad y Sexo")
-        st.markdown(
-            """
-            Este gráfico explora la relación entre la edad de los estudiantes y sus notas finales (G3), 
-            desglosada por sexo. Permite observar patrones de rendimiento académico a través de diferentes 
-            grupos de edad, separados en categorías de género.
-            """
-        )
-        fig, ax = plt.subplots(figsize=(12, 6))
-        age_sex_data = filtered_data.groupby(["age", "sex"])["G3"].mean().unstack()
+        return fig
+    show_chart("g3_school_sex", draw_g3_school_sex)
+    download_table(g3_school_sex, "g3_colegio_sexo")
+
+# Nota final por edad y sexo
+@registry.panel(VISUALIZACIONES, "Nota Final (G3) por Edad y Sexo", inputs=["g3_age_sex"])
+def panel_g3_age_sex(g3_age_sex):
+    st.subheader("Nota Final (G3) por Edad y Sexo")
+    st.markdown(
+        """
+        Este gráfico explora la relación entre la edad de los estudiantes y sus notas finales (G3), 
+        desglosada por sexo. Permite observar patrones de rendimiento académico a través de diferentes 
+        grupos de edad, separados en categorías de género.
+        """
+    )
+    def draw_g3_age_sex():
+        fig, ax = new_figure("xwide")
+        age_sex_data = g3_age_sex.unstack()
         age_sex_data.plot(kind="bar", ax=ax, stacked=False, color=["#90EE90", "#FFB6C1"])
+        label_bars(ax, fmt="%.1f", fontsize=8)
         ax.set_title("Nota Final (G3) por Edad y Sexo", fontsize=14, color="navy")
         ax.set_xlabel("Edad", fontsize=12)
         ax.set_ylabel("Nota Promedio (G3)", fontsize=12)
-        st.pyplot(fig)
-    with st.expander("Impacto de los recursos de apoyo escolar en las notas", expanded=False):
-        # Impacto de apoyo escolar
-        st.subheader("Impacto del Apoyo Escolar y Familiar")
-        st.markdown("Esta sección analiza cómo el apoyo escolar y familiar afecta las notas finales de los estudiantes (G3).")
-
-        fig, ax = plt.subplots(figsize=(8, 6))
-        schoolsup_data = filtered_data.groupby("schoolsup")["G3"].mean()
-        ax.bar(schoolsup_data.index, schoolsup_data.values, color=["#d73027", "#4575b4"])
+        return fig
+    show_chart("g3_age_sex", draw_g3_age_sex)
+    download_table(g3_age_sex, "g3_edad_sexo")
+
+
+@registry.panel(VISUALIZACIONES, "Impacto de los recursos de apoyo escolar en las notas", inputs=["g3_schoolsup", "g3_famsup", "g3_internet_box", "studytime_internet_schoolsup_box"])
+def panel_support_impact(schoolsup_data, famsup_data, internet_box, studytime_box):
+    # Impacto de apoyo escolar
+    st.subheader("Impacto del Apoyo Escolar y Familiar")
+    st.markdown("Esta sección analiza cómo el apoyo escolar y familiar afecta las notas finales de los estudiantes (G3).")
+
+    def draw_g3_schoolsup():
+        fig, ax = new_figure("bar")
+        ax.bar(schoolsup_data.index.map(YES_NO_LABELS), schoolsup_data.values, color=["#d73027", "#4575b4"])
+        label_bars(ax)
         ax.set_title("Impacto del Apoyo Escolar en la Nota Final (G3)", fontsize=14, color="navy")
         ax.set_xlabel("Apoyo Escolar (Sí/No)", fontsize=12)
         ax.set_ylabel("Nota Promedio (G3)", fontsize=12)
-        st.pyplot(fig)
-        st.markdown("El gráfico muestra que los estudiantes sin apoyo escolar (schoolsup = no) tienen un rendimiento ligeramente superior en la nota final (G3) en comparación con quienes reciben apoyo escolar, aunque las diferencias en los promedios son pequeñas y la mediana es más alta para el grupo sin apoyo. Esto podría explicarse porque los estudiantes con apoyo escolar suelen requerir asistencia debido a dificultades académicas previas, mientras que quienes no lo reciben podrían tener una base académica más sólida y no necesitar este tipo de ayuda.")
-        
-        # Impacto del apoyo familiar
-        fig, ax = plt.subplots(figsize=(8, 6))
-        famsup_data = filtered_data.groupby("famsup")["G3"].mean()
-        ax.bar(famsup_data.index, famsup_data.values, color=["#d73027", "#4575b4"])
+        return fig
+    show_chart("g3_schoolsup", draw_g3_schoolsup)
+    download_table(schoolsup_data, "g3_apoyo_escolar")
+    st.markdown("El gráfico muestra que los estudiantes sin apoyo escolar (schoolsup = no) tienen un rendimiento ligeramente superior en la nota final (G3) en comparación con quienes reciben apoyo escolar, aunque las diferencias en los promedios son pequeñas y la mediana es más alta para el grupo sin apoyo. Esto podría explicarse porque los estudiantes con apoyo escolar suelen requerir asistencia debido a dificultades académicas previas, mientras que quienes no lo reciben podrían tener una base académica más sólida y no necesitar este tipo de ayuda.")
+    
+    # Impacto del apoyo familiar
+    def draw_g3_famsup():
+        fig, ax = new_figure("bar")
+        ax.bar(famsup_data.index.map(YES_NO_LABELS), famsup_data.values, color=["#d73027", "#4575b4"])
+        label_bars(ax)
         ax.set_title("Impacto del Apoyo Familiar en la Nota Final (G3)", fontsize=14, color="navy")
         ax.set_xlabel("Apoyo Familiar (Sí/No)", fontsize=12)
         ax.set_ylabel("Nota Promedio (G3)", fontsize=12)
-        st.pyplot(fig)
-
-        st.markdown("Los estudiantes que reciben apoyo familiar (famsup = yes) presentan un rendimiento en G3 ligeramente superior al de aquellos que no lo reciben, aunque las diferencias en las notas finales entre ambos grupos son mínimas. Esto sugiere que, si bien el apoyo familiar podría ser un factor motivador, su impacto en el rendimiento académico es limitado, y otros factores como los hábitos de estudio (studytime) o la asistencia (absences) podrían tener una influencia más significativa en las calificaciones.")
+        return fig
+    show_chart("g3_famsup", draw_g3_famsup)
+    download_table(famsup_data, "g3_apoyo_familiar")
 
-        # Comparación con acceso a internet
-        st.subheader("Impacto del Acceso a Internet")
-        st.markdown(
-            """
-            Aquí se analiza cómo el acceso a Internet afecta el rendimiento académico final. 
+    st.markdown("Los estudiantes que reciben apoyo familiar (famsup = yes) presentan un rendimiento en G3 ligeramente superior al de aquellos que no lo reciben, aunque las diferencias en las notas finales entre ambos grupos son mínimas. Esto sugiere que, si bien el apoyo familiar podría ser un factor motivador, su impacto en el rendimiento académico es limitado, y otros factores como los hábitos de estudio (studytime) o la asistencia (absences) podrían tener una influencia más significativa en las calificaciones.")
 
-            """
-        )
-        # Crear el gráfico
-        fig, ax = plt.subplots(figsize=(8, 6))
+    # Comparación con acceso a internet
+    st.subheader("Impacto del Acceso a Internet")
+    st.markdown(
+        """
+        Aquí se analiza cómo el acceso a Internet afecta el rendimiento académico final. 
 
-        # Dividir los datos en función de la columna 'internet'
-        categories = data['internet'].unique()  # Categorías únicas en la columna 'internet'
-        data_to_plot = [data[data['internet'] == category]['G3'] for category in categories]
+        """
+    )
+    # Crear el gráfico
+    def draw_g3_internet_box():
+        fig, ax = new_figure("bar")
 
-        # Crear boxplot
-        ax.boxplot(data_to_plot, labels=categories)
+        # Crear boxplot a partir de los resúmenes precalculados (sin/con internet)
+        ax.bxp(internet_box)
 
         # Configurar títulos y etiquetas
         ax.set_title('Impacto del acceso a internet en la Nota final (G3)', fontsize=14)
         ax.set_xlabel('Acceso a Internet', fontsize=12)
         ax.set_ylabel('Nota final (G3)', fontsize=12)
         # Mostrar el gráfico en Streamlit
-        st.pyplot(fig)
-    
-        st.markdown(
-            """
-            El acceso a internet por sí solo no parece ser un factor determinante en el rendimiento académico (G3), ya que::
-            
-            - Tanto los estudiantes con acceso a internet ("yes") como aquellos sin acceso ("no") tienen una mediana de calificaciones finales (G3) muy parecida, alrededor de 12. Esto sugiere que, en promedio, el acceso a internet no tiene un impacto significativo en la nota final.
-            - Los estudiantes con acceso a internet tienen una distribución ligeramente más compacta en las calificaciones (menos dispersión) en comparación con los estudiantes sin acceso.
-            """
-        )
-        # Acceso a internet (internet), las horas de estudio (studytime), y el apoyo escolar (schoolsup) están relacionados.
-        st.subheader("Impacto del Acceso a Internet, horas de estudio, y apoyo escolar")
-        st.markdown(
-            """
-            El gráfico muestra cómo el acceso a internet, las horas de estudio y el apoyo escolar están relacionados. 
+        return fig
+    show_chart("g3_internet_box", draw_g3_internet_box)
 
-            """
-        )
-        # Crear gráfico combinado
-        fig, ax = plt.subplots(figsize=(10, 6))
+    st.markdown(
+        """
+        El acceso a internet por sí solo no parece ser un factor determinante en el rendimiento académico (G3), ya que::
+        
+        - Tanto los estudiantes con acceso a internet ("yes") como aquellos sin acceso ("no") tienen una mediana de calificaciones finales (G3) muy parecida, alrededor de 12. Esto sugiere que, en promedio, el acceso a internet no tiene un impacto significativo en la nota final.
+        - Los estudiantes con acceso a internet tienen una distribución ligeramente más compacta en las calificaciones (menos dispersión) en comparación con los estudiantes sin acceso.
+        """
+    )
+    # Acceso a internet (internet), las horas de estudio (studytime), y el apoyo escolar (schoolsup) están relacionados.
+    st.subheader("Impacto del Acceso a Internet, horas de estudio, y apoyo escolar")
+    st.markdown(
+        """
+        El gráfico muestra cómo el acceso a internet, las horas de estudio y el apoyo escolar están relacionados. 
 
-        # Agrupar datos y definir colores
-        grouped_data = data.groupby(['internet', 'schoolsup'])['studytime']
+        """
+    )
+    # Crear gráfico combinado
+    def draw_studytime_internet_schoolsup_box():
+        fig, ax = new_figure("wide_rotated")
+
+        # Definir colores
         colors = {'yes': '#FF6347', 'no': '#4682B4'}
         positions = [1, 2, 4, 5]  # Posiciones de los boxplots
         labels = ['No Internet / No Apoyo', 'No Internet / Apoyo', 'Internet / No Apoyo', 'Internet / Apoyo']
 
-        # Crear boxplots
-        box_data = []
-        for internet_value in ['no', 'yes']:
-            for schoolsup_value in ['no', 'yes']:
-                subset = data[
-                    (data['internet'] == internet_value) & 
-                    (data['schoolsup'] == schoolsup_value)
-                ]['studytime']
-                box_data.append(subset)
-
-        # Dibujar el gráfico
-        bp = ax.boxplot(box_data, positions=positions, patch_artist=True, widths=0.6)
+        # Dibujar el gráfico a partir de los resúmenes por internet × apoyo escolar
+        bp = ax.bxp(studytime_box, positions=positions, patch_artist=True, widths=0.6)
 
         # Personalizar colores
         for patch, group in zip(bp['boxes'], [f'no_{k}' for k in colors] + [f'yes_{k}' for k in colors]):
@@ -326,128 +655,283 @@ elif seleccion == "📊 Visualizaciones Interactivas":
         ax.grid(axis='y', linestyle='--', alpha=0.7)
 
         # Mostrar el gráfico en Streamlit
-        st.pyplot(fig)
-        st.markdown(
-            """
-            Los estudiantes sin internet que reciben apoyo escolar tienden a tener un rango más amplio y una mediana ligeramente superior de horas de estudio, lo que sugiere que este apoyo fomenta mejores hábitos de estudio. En cambio, quienes no tienen apoyo escolar muestran una mediana más baja, indicando menor constancia. Entre los estudiantes con acceso a internet, aquellos con apoyo escolar mantienen una mediana alta y datos más consistentes, reforzando la importancia del apoyo escolar. Sin embargo, quienes no cuentan con este apoyo presentan una mayor dispersión en las horas de estudio, lo que sugiere que el acceso a internet por sí solo no garantiza hábitos eficientes.
-            """
-        )
-elif seleccion == "📉 Visualización de correlación":
-    with st.expander("Correlación entre horas de estudio y rendimiento académico", expanded=False):
-        st.header("Correlación entre horas de estudio y rendimiento académico")
-
-        # Texto explicativo
-        st.markdown(
-            """
-            En esta sección se explora la relación entre el tiempo dedicado al estudio semanal (**studytime**) y las calificaciones en los tres periodos académicos:
-            **G1 (Primer Periodo)**, **G2 (Segundo Periodo)**, y **G3 (Nota Final)**. Además, se muestran las correlaciones calculadas entre estas variables.
-            """
-        )
+        return fig
+    show_chart("studytime_internet_schoolsup_box", draw_studytime_internet_schoolsup_box)
+    st.markdown(
+        """
+        Los estudiantes sin internet que reciben apoyo escolar tienden a tener un rango más amplio y una mediana ligeramente superior de horas de estudio, lo que sugiere que este apoyo fomenta mejores hábitos de estudio. En cambio, quienes no tienen apoyo escolar muestran una mediana más baja, indicando menor constancia. Entre los estudiantes con acceso a internet, aquellos con apoyo escolar mantienen una mediana alta y datos más consistentes, reforzando la importancia del apoyo escolar. Sin embargo, quienes no cuentan con este apoyo presentan una mayor dispersión en las horas de estudio, lo que sugiere que el acceso a internet por sí solo no garantiza hábitos eficientes.
+        """
+    )
 
-        # Cálculo de correlaciones
-        correlacion_G1 = filtered_data["studytime"].corr(filtered_data["G1"])
-        correlacion_G2 = filtered_data["studytime"].corr(filtered_data["G2"])
-        correlacion_G3 = filtered_data["studytime"].corr(filtered_data["G3"])
 
-        # Mostrar las correlaciones
-        st.write(f"**Correlación entre Studytime y G1:** {correlacion_G1:.2f}")
-        st.write(f"**Correlación entre Studytime y G2:** {correlacion_G2:.2f}")
-        st.write(f"**Correlación entre Studytime y G3:** {correlacion_G3:.2f}")
+@registry.panel(CORRELACION, "Correlación entre horas de estudio y rendimiento académico", inputs=["pearson", "fits_studytime", "filtered_data"])
+def panel_studytime_correlation(pearson, fits, filtered_data):
+    st.header("Correlación entre horas de estudio y rendimiento académico")
+
+    # Texto explicativo
+    st.markdown(
+        """
+        En esta sección se explora la relación entre el tiempo dedicado al estudio semanal (**studytime**) y las calificaciones en los tres periodos académicos:
+        **G1 (Primer Periodo)**, **G2 (Segundo Periodo)**, y **G3 (Nota Final)**. Además, se muestran las correlaciones calculadas entre estas variables.
+        """
+    )
+
+    # Cálculo de correlaciones
+    correlacion_G1 = pearson.loc["studytime", "G1"]
+    correlacion_G2 = pearson.loc["studytime", "G2"]
+    correlacion_G3 = pearson.loc["studytime", "G3"]
+
+    # Mostrar las correlaciones
+    st.write(f"**Correlación entre Studytime y G1:** {correlacion_G1:.2f}")
+    st.write(f"**Correlación entre Studytime y G2:** {correlacion_G2:.2f}")
+    st.write(f"**Correlación entre Studytime y G3:** {correlacion_G3:.2f}")
+    st.write(
+        "**Pendiente por hora de estudio:** "
+        + ", ".join(f"{grade}: {fits[grade].slope:+.2f} (R² = {fits[grade].r2:.2f})" for grade in GRADES)
+    )
 
-        # Gráfico: Studytime vs G1, G2, G3
-        fig, axes = plt.subplots(1, 3, figsize=(18, 5), sharey=True)
+    # Gráfico: Studytime vs G1, G2, G3
+    def draw_studytime_grades_scatter():
+        fig, axes = new_figure("row", 1, 3, sharey=True)
         fig.suptitle("Relación entre Horas de Estudio y Notas (G1, G2, G3)", fontsize=16)
 
         # Gráficos individuales
-        axes[0].scatter(filtered_data["studytime"], filtered_data["G1"], alpha=0.6, color="blue")
+        scatter(axes[0], filtered_data["studytime"], filtered_data["G1"], alpha=0.6, color="blue")
         axes[0].set_title("Studytime vs G1")
         axes[0].set_xlabel("Studytime")
         axes[0].set_ylabel("G1")
 
-        axes[1].scatter(filtered_data["studytime"], filtered_data["G2"], alpha=0.6, color="orange")
+        scatter(axes[1], filtered_data["studytime"], filtered_data["G2"], alpha=0.6, color="orange")
         axes[1].set_title("Studytime vs G2")
         axes[1].set_xlabel("Studytime")
 
-        axes[2].scatter(filtered_data["studytime"], filtered_data["G3"], alpha=0.6, color="green")
+        scatter(axes[2], filtered_data["studytime"], filtered_data["G3"], alpha=0.6, color="green")
         axes[2].set_title("Studytime vs G3")
         axes[2].set_xlabel("Studytime")
 
-        plt.tight_layout()
-        st.pyplot(fig)
+        # Recta de regresión de cada nota (dos puntos por recta)
+        for ax, grade in zip(axes, GRADES):
+            xs, ys = fits[grade].endpoints(1, 4)
+            ax.plot(xs, ys, color="red")
 
-    with st.expander("Correlación entre ausencias y rendimiento académico", expanded=False):
-        st.header("Correlación entre ausencias y rendimiento académico")
+        fig.tight_layout()
+        return fig
+    show_chart("studytime_grades_scatter", draw_studytime_grades_scatter)
 
-        # Texto explicativo
-        st.markdown(
-            """
-            En esta sección se analiza la relación entre el número de ausencias (**absences**) y las calificaciones académicas (**G1, G2, G3**). 
-            Se incluye una línea de regresión que indica cómo las ausencias afectan las calificaciones, sugiriendo una correlación negativa.
-            """
-        )
 
-        # Cálculo de correlaciones para ausencias
-        corr_absences_G1 = filtered_data["absences"].corr(filtered_data["G1"])
-        corr_absences_G2 = filtered_data["absences"].corr(filtered_data["G2"])
-        corr_absences_G3 = filtered_data["absences"].corr(filtered_data["G3"])
-
-        # Mostrar las correlaciones
-        st.write(f"**Correlación entre Ausencias y G1:** {corr_absences_G1:.2f}")
-        st.write(f"**Correlación entre Ausencias y G2:** {corr_absences_G2:.2f}")
-        st.write(f"**Correlación entre Ausencias y G3:** {corr_absences_G3:.2f}")
-
-        # Gráfico de regresión para G3
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.scatter(filtered_data["absences"], filtered_data["G3"], alpha=0.6, color="purple", s=30, label="Datos")
-        m, b = np.polyfit(filtered_data["absences"], filtered_data["G3"], 1)
-        ax.plot(filtered_data["absences"], m * filtered_data["absences"] + b, color="red", label="Línea de regresión")
+@registry.panel(CORRELACION, "Correlación entre ausencias y rendimiento académico", inputs=["pearson", "fit_absences_g3", "filtered_data"])
+def panel_absences_correlation(pearson, fit, filtered_data):
+    st.header("Correlación entre ausencias y rendimiento académico")
+
+    # Texto explicativo
+    st.markdown(
+        """
+        En esta sección se analiza la relación entre el número de ausencias (**absences**) y las calificaciones académicas (**G1, G2, G3**). 
+        Se incluye una línea de regresión que indica cómo las ausencias afectan las calificaciones, sugiriendo una correlación negativa.
+        """
+    )
+
+    # Cálculo de correlaciones para ausencias
+    corr_absences_G1 = pearson.loc["absences", "G1"]
+    corr_absences_G2 = pearson.loc["absences", "G2"]
+    corr_absences_G3 = pearson.loc["absences", "G3"]
+
+    # Mostrar las correlaciones
+    st.write(f"**Correlación entre Ausencias y G1:** {corr_absences_G1:.2f}")
+    st.write(f"**Correlación entre Ausencias y G2:** {corr_absences_G2:.2f}")
+    st.write(f"**Correlación entre Ausencias y G3:** {corr_absences_G3:.2f}")
+
+    if filtered_data.empty:
+        st.info("No hay estudiantes con los filtros seleccionados.")
+        return
+
+    # Gráfico de regresión para G3
+    def draw_absences_g3_regression():
+        fig, ax = new_figure("bar")
+        scatter(ax, filtered_data["absences"], filtered_data["G3"], alpha=0.6, color="purple", s=30, label="Datos")
+        x_max = int(filtered_data["absences"].max())
+        xs, ys = fit.endpoints(0, x_max)
+        ax.plot(xs, ys, color="red", label="Línea de regresión")
+        band_x = np.linspace(0, x_max, 50)
+        low, high = fit.band(band_x)
+        ax.fill_between(band_x, low, high, color="red", alpha=0.15, label="Intervalo de confianza (95%)")
         ax.set_title("Relación entre Ausencias y Nota Final (G3)", fontsize=14, color="navy")
         ax.set_xlabel("Número de Ausencias", fontsize=12)
         ax.set_ylabel("Nota Final (G3)", fontsize=12)
         ax.legend()
-        st.pyplot(fig)
+        return fig
+    show_chart("absences_g3_regression", draw_absences_g3_regression)
+    st.write(f"**Pendiente:** {fit.slope:.3f} puntos de G3 por ausencia, **R²:** {fit.r2:.3f}")
+
+
+@registry.panel(CORRELACION, "Regresión lineal múltiple", inputs=["moments"])
+def panel_multiple_regression(stats):
+    st.header("Regresión lineal múltiple")
+    st.markdown("Ajuste por mínimos cuadrados de una nota a partir de varias variables numéricas a la vez.")
+    objetivo = st.selectbox("Variable a explicar", GRADES, index=2, key="regresion_objetivo")
+    predictores = st.multiselect(
+        "Variables explicativas", [column for column in NUMERIC if column != objetivo],
+        default=["studytime", "failures", "absences"], key="regresion_predictores"
+    )
+    if not predictores:
+        st.info("Selecciona al menos una variable explicativa.")
+        return
+    if stats.n <= len(predictores) + 1:
+        st.warning(
+            f"Hay {stats.n} estudiantes en la selección: se necesitan al menos {len(predictores) + 2} "
+            "para ajustar la regresión con estas variables."
+        )
+        return
+    result = fit_multiple(stats, predictores, objetivo)
+    if result.dropped:
+        st.warning(
+            "Sin variación en la selección, se omiten del ajuste: " + ", ".join(result.dropped) + "."
+        )
+    usadas = {column: value for column, value in result.coefficients.items() if column not in result.dropped}
+    coeficientes = pd.DataFrame(
+        {"Coeficiente": [result.intercept, *usadas.values()]},
+        index=["Intercepto", *usadas],
+    )
+    st.dataframe(coeficientes.style.format("{:.3f}"))
+    download_table(coeficientes.rename_axis("variable"), "regresion_multiple")
+    st.write(f"**R²:** {result.r2:.3f} (n = {result.n})")
+
+
+@registry.panel(CORRELACION, "Matriz de correlación entre variables numéricas")
+def panel_correlation_matrix():
+    st.header("Matriz de correlación entre variables numéricas")
+    st.markdown(
+        """
+        Correlación entre todos los pares de variables numéricas del dataset (datos familiares, hábitos, 
+        ausencias y notas). **Pearson** mide relaciones lineales; **Spearman** usa rangos y capta relaciones 
+        monótonas aunque no sean lineales.
+        """
+    )
+    metodo = st.radio("Método", ["Pearson", "Spearman"], horizontal=True, key="metodo_correlacion")
+    matrix = context.get(metodo.lower())
+
+    def draw_correlation_heatmap():
+        fig, ax = new_figure("matrix")
+        image = ax.imshow(matrix.to_numpy(), cmap="coolwarm", vmin=-1, vmax=1)
+        ax.set_xticks(range(len(matrix.columns)))
+        ax.set_xticklabels(matrix.columns, rotation=45, ha="right")
+        ax.set_yticks(range(len(matrix.index)))
+        ax.set_yticklabels(matrix.index)
+        for i, j in np.ndindex(matrix.shape):
+            ax.text(j, i, f"{matrix.iat[i, j]:.2f}", ha="center", va="center", fontsize=7)
+        fig.colorbar(image, ax=ax, shrink=0.8)
+        ax.set_title(f"Matriz de correlación ({metodo})", fontsize=14, color="navy")
+        return fig
+    show_chart(f"correlation_heatmap_{metodo.lower()}", draw_correlation_heatmap)
+    download_table(matrix.rename_axis("variable"), f"correlacion_{metodo.lower()}")
+
+@registry.section(RIESGO)
+def section_risk():
+    st.header("🚨 Riesgo académico")
+    st.markdown(
+        """
+        Estimación de la nota final esperada y de la probabilidad de reprobar (**G3 < 10**) de cada estudiante a partir 
+        de sus notas de los primeros periodos (**G1, G2**), sus ausencias, las materias reprobadas y el tiempo de estudio. 
+        Los puntajes se calculan sobre los estudiantes que cumplen los filtros de la barra lateral.
+        """
+    )
 
-elif seleccion == "✅ Resultados":
+
+@registry.panel(RIESGO, "Estudiantes en riesgo", inputs=["risk_ranking", "risk_bands"])
+def panel_risk_ranking(ranking, bands):
+    st.header("Estudiantes en riesgo")
+    for column, (label, count) in zip(st.columns(len(bands)), bands.items()):
+        column.metric(f"Riesgo {label}", f"{count:,}")
+    cantidad = st.slider("Estudiantes a mostrar", 10, RANK_TOP, 50, step=10, key="riesgo_cantidad")
+    columnas = ["school", "sex", "age", "G1", "G2", "absences", "failures", "studytime", "G3",
+                "G3_esperada", "prob_reprobar"]
+    st.dataframe(ranking[columnas].head(cantidad).style.format({"G3_esperada": "{:.1f}", "prob_reprobar": "{:.1%}"}))
+    download_table(ranking[columnas].reset_index(drop=True), "estudiantes_en_riesgo")
+
+
+@registry.panel(RIESGO, "Distribución del riesgo", inputs=["risk_bands"])
+def panel_risk_distribution(bands):
+    st.header("Distribución del riesgo")
+
+    def draw_risk_bands():
+        fig, ax = new_figure("bar")
+        ax.bar(bands.index.astype(str), bands.to_numpy(), color=["#2E8B57", "#FFD700", "#FF8C00", "#B22222"])
+        ax.set_title("Estudiantes por nivel de riesgo de reprobar", fontsize=14, color="navy")
+        ax.set_xlabel("Probabilidad de reprobar: bajo < 25% ≤ moderado < 50% ≤ alto < 75% ≤ muy alto", fontsize=10)
+        ax.set_ylabel("Estudiantes", fontsize=12)
+        label_bars(ax, fmt="%d")
+        return fig
+    show_chart("risk_bands", draw_risk_bands)
+    download_table(bands, "niveles_de_riesgo")
+
+
+@registry.panel(RIESGO, "Modelo de riesgo", inputs=["risk_model"])
+def panel_risk_model(model):
+    st.header("Modelo de riesgo")
+    st.markdown(
+        """
+        **Nota esperada:** regresión lineal de G3. **Probabilidad de reprobar:** regresión logística; la razón de 
+        chances indica por cuánto se multiplican las chances de reprobar con una unidad más de cada variable.
+        """
+    )
+    coeficientes = pd.DataFrame({
+        "Coeficiente G3": pd.Series(model.grade.coefficients),
+        "Razón de chances": model.odds_ratios(),
+    })
+    st.dataframe(coeficientes.style.format("{:.3f}"))
+    download_table(coeficientes.rename_axis("variable"), "modelo_riesgo")
+    st.write(f"**R² (G3):** {model.grade.r2:.3f}, ajustado con {model.n:,} estudiantes")
+
+
+@registry.section(RESULTADOS)
+def section_results():
     st.header("✅ Resultados")
 
-    # Análisis descriptivo
-    with st.expander("📋 Análisis Descriptivo", expanded=False):
-        st.markdown(
-            """
-            - Un análisis estadístico básico revela que, en promedio, los estudiantes de ambos colegios muestran una mayor influencia en su desempeño académico por parte de la madre en comparación con el padre. Este resultado sugiere que el rol materno tiene un impacto más significativo en el apoyo educativo de los estudiantes.
-            - Existe una gran diferencia entre las horas libres y las horas de estudio. Quizás, dicha diferencia se refleja en 
-              las notas escolares; puesto que la media de notas por periodo escolar no supera los 12 puntos (de los 20 puntos máximos otorgables).
-            """
-        )
 
-    # Visualización segmentada
-    with st.expander("📊 Visualización Segmentada", expanded=False):
-        st.markdown(
-            """
-            - Al segmentar las notas por género, se observa un mayor esfuerzo reflejado en los resultados académicos de las mujeres en comparación con los hombres.
-            - Con base en la interpretación anterior, se observa que el colegio Gabriel Pereira presenta calificaciones superiores en comparación con el Mousinho da Silveira. Además, en ambos casos, las mujeres obtienen notas más altas que los hombres, manteniendo una tendencia consistente.
-            - Al realizar una separación por edades, se observa que los jóvenes de 19 años no demuestran interés respecto a sus notas a comparación de las demás edades. Sin embargo, segmentar de esta manera, muestra resultados distintos a los análisis anteriores, puesto que jóvenes hombres de 15 y 20 años tienen mayores calificaciones que las mujeres.
-            - Los resultados muestran que los estudiantes que no reciben apoyo educativo formal tienden a obtener mejores calificaciones. Esto podría explicarse por el hecho de que, en ausencia de apoyo escolar, muchos de ellos cuentan con apoyo familiar, lo que influye positivamente en su desempeño académico. Además, se evidencia que aquellos estudiantes que recurren al conocimiento disponible en internet también logran mejorar sus calificaciones, lo que sugiere que las fuentes alternativas de aprendizaje pueden complementar eficazmente su formación.
-            - Los resultados indican que los estudiantes sin acceso a internet que reciben apoyo escolar tienden a dedicar un rango más amplio de horas al estudio, con una mediana ligeramente superior, lo que sugiere que el apoyo escolar contribuye a fomentar mejores hábitos de estudio. Por el contrario, aquellos que no cuentan con dicho apoyo presentan una mediana más baja en sus horas de estudio, lo que refleja una menor constancia en sus hábitos académicos.
-            """
-        )
-        # Expander para Resultados de las Correlaciones
-    with st.expander("🔗 Resultados de las Correlaciones", expanded=False):
-        st.markdown(
-            """
-            ### Correlación entre Faltas de asistencia y Notas
-            - Los resultados muestran que, para la variable **absences**, los estudiantes con pocas ausencias (entre 0 y 10) tienden a obtener calificaciones más altas en **G3**, generalmente por encima de 7.5. 
-            - Además, se observa una correlación negativa entre las ausencias y las notas finales: a medida que aumenta el número de ausencias, las calificaciones tienden a disminuir.
-
-            ### Correlación entre Apoyo escolar y Notas
-            - Los resultados muestran que los estudiantes que no reciben apoyo escolar (**schoolsup = no**) tienen un rendimiento ligeramente superior en la nota final (**G3**) en comparación con aquellos que sí reciben apoyo. 
-            - Aunque las diferencias en los promedios son pequeñas, la mediana es más alta en el grupo sin apoyo escolar. Esto podría deberse a que los estudiantes que requieren apoyo suelen enfrentarse a dificultades académicas previas, mientras que quienes no lo necesitan podrían tener una base académica más sólida.
-            - Por otro lado, los estudiantes que reciben apoyo familiar (**famsup = yes**) presentan un rendimiento en **G3** ligeramente superior al de aquellos que no cuentan con este respaldo. Sin embargo, las diferencias en las calificaciones finales entre ambos grupos son mínimas. Esto indica que, aunque el apoyo familiar podría ser un factor motivador, su influencia en el rendimiento académico es limitada, y variables como los hábitos de estudio (**studytime**) o la asistencia (**absences**) podrían tener un impacto más significativo en las notas.
-            """
+# Análisis descriptivo
+@registry.panel(RESULTADOS, "📋 Análisis Descriptivo", lazy=False)
+def panel_descriptive_results():
+    st.markdown(
+        """
+        - Un análisis estadístico básico revela que, en promedio, los estudiantes de ambos colegios muestran una mayor influencia en su desempeño académico por parte de la madre en comparación con el padre. Este resultado sugiere que el rol materno tiene un impacto más significativo en el apoyo educativo de los estudiantes.
+        - Existe una gran diferencia entre las horas libres y las horas de estudio. Quizás, dicha diferencia se refleja en 
+          las notas escolares; puesto que la media de notas por periodo escolar no supera los 12 puntos (de los 20 puntos máximos otorgables).
+        """
+    )
+
+# Visualización segmentada
+@registry.panel(RESULTADOS, "📊 Visualización Segmentada", lazy=False)
+def panel_segmented_results():
+    st.markdown(
+        """
+        - Al segmentar las notas por género, se observa un mayor esfuerzo reflejado en los resultados académicos de las mujeres en comparación con los hombres.
+        - Con base en la interpretación anterior, se observa que el colegio Gabriel Pereira presenta calificaciones superiores en comparación con el Mousinho da Silveira. Además, en ambos casos, las mujeres obtienen notas más altas que los hombres, manteniendo una tendencia consistente.
+        - Al realizar una separación por edades, se observa que los jóvenes de 19 años no demuestran interés respecto a sus notas a comparación de las demás edades. Sin embargo, segmentar de esta manera, muestra resultados distintos a los análisis anteriores, puesto que jóvenes hombres de 15 y 20 años tienen mayores calificaciones que las mujeres.
+        - Los resultados muestran que los estudiantes que no reciben apoyo educativo formal tienden a obtener mejores calificaciones. Esto podría explicarse por el hecho de que, en ausencia de apoyo escolar, muchos de ellos cuentan con apoyo familiar, lo que influye positivamente en su desempeño académico. Además, se evidencia que aquellos estudiantes que recurren al conocimiento disponible en internet también logran mejorar sus calificaciones, lo que sugiere que las fuentes alternativas de aprendizaje pueden complementar eficazmente su formación.
+        - Los resultados indican que los estudiantes sin acceso a internet que reciben apoyo escolar tienden a dedicar un rango más amplio de horas al estudio, con una mediana ligeramente superior, lo que sugiere que el apoyo escolar contribuye a fomentar mejores hábitos de estudio. Por el contrario, aquellos que no cuentan con dicho apoyo presentan una mediana más baja en sus horas de estudio, lo que refleja una menor constancia en sus hábitos académicos.
+        """
     )
 
 
-elif seleccion == "🧐 Conclusiones":
+@registry.panel(RESULTADOS, "🔗 Resultados de las Correlaciones", lazy=False)
+def panel_correlation_results():
+    st.markdown(
+        """
+        ### Correlación entre Faltas de asistencia y Notas
+        - Los resultados muestran que, para la variable **absences**, los estudiantes con pocas ausencias (entre 0 y 10) tienden a obtener calificaciones más altas en **G3**, generalmente por encima de 7.5. 
+        - Además, se observa una correlación negativa entre las ausencias y las notas finales: a medida que aumenta el número de ausencias, las calificaciones tienden a disminuir.
+
+        ### Correlación entre Apoyo escolar y Notas
+        - Los resultados muestran que los estudiantes que no reciben apoyo escolar (**schoolsup = no**) tienen un rendimiento ligeramente superior en la nota final (**G3**) en comparación con aquellos que sí reciben apoyo. 
+        - Aunque las diferencias en los promedios son pequeñas, la mediana es más alta en el grupo sin apoyo escolar. Esto podría deberse a que los estudiantes que requieren apoyo suelen enfrentarse a dificultades académicas previas, mientras que quienes no lo necesitan podrían tener una base académica más sólida.
+        - Por otro lado, los estudiantes que reciben apoyo familiar (**famsup = yes**) presentan un rendimiento en **G3** ligeramente superior al de aquellos que no cuentan con este respaldo. Sin embargo, las diferencias en las calificaciones finales entre ambos grupos son mínimas. Esto indica que, aunque el apoyo familiar podría ser un factor motivador, su influencia en el rendimiento académico es limitada, y variables como los hábitos de estudio (**studytime**) o la asistencia (**absences**) podrían tener un impacto más significativo en las notas.
+        """
+)
+
+
+
+@registry.section(CONCLUSIONES)
+def section_conclusions():
     st.header("🧐 Conclusiones")
     st.markdown(
         """
@@ -461,6 +945,41 @@ elif seleccion == "🧐 Conclusiones":
         unsafe_allow_html=True
     )
 
+
+# Mostrar la sección seleccionada
+registry.render(seleccion, context)
+tracer.stop(rerun_span)
+
+# Panel de administración oculto: tiempos por tramo (p50/p95 de los últimos reruns),
+# el desglose del último rerun y el estado del caché. Se muestra con ``?admin=1`` en
+# la URL o con DASHBOARD_ADMIN=1.
+if os.environ.get("DASHBOARD_ADMIN") == "1" or st.query_params.get("admin") == "1":
+    with st.sidebar.expander("⏱️ Tiempos (admin)", expanded=False):
+        st.markdown("**Tramos** (ordenados por p95)")
+        st.dataframe(tracer.summary().round(2), hide_index=True)
+        st.markdown("**Último rerun**")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "span": record.name,
+                        "ms": record.duration * 1000,
+                        "mem_kb": record.rss_delta / 1024 if record.rss_delta is not None else None,
+                        "cache_hit": record.attrs.get("cache_hit"),
+                    }
+                    for record in tracer.last_trace()
+                ],
+                columns=["span", "ms", "mem_kb", "cache_hit"],
+            ).round(2),
+            hide_index=True,
+        )
+        st.markdown("**Caché de resultados**")
+        st.json(result_cache.stats())
+        if st.button("Exportar JSONL y Prometheus", key="admin_exportar"):
+            tracer.export_jsonl(os.path.join(EXPORT_DIR, "spans.jsonl"))
+            tracer.write_prometheus(os.path.join(EXPORT_DIR, "metrics.prom"))
+            st.success(f"Exportado en {EXPORT_DIR}/")
+
 # Sección de Créditos
 st.sidebar.markdown("### Créditos:")
 st.sidebar.markdown("""
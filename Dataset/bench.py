@@ -0,0 +1,239 @@
+"""Benchmarks del dashboard a escala (100K, 1M y 10M filas sintéticas).
+
+Para cada escala genera (una vez) el CSV con :mod:`synth` y mide, en un proceso
+aparte para que la memoria pico de cada escala sea independiente:
+
+* ``load:csv`` (lectura por bloques, validación y escritura del caché Arrow) y
+  ``load:arrow`` (lectura del caché ya escrito),
+* la construcción del índice de filtros, el filtrado de algunos estados típicos y
+  los resúmenes sumables,
+* cada sección de ``app.py`` ejecutada sin navegador con todos sus paneles abiertos
+  (``app:<sección>`` en frío y ``app:<sección>:warm`` al repetir el rerun), más cada
+  entrada, gráfico y panel medidos por :mod:`instrument`.
+
+Cada escala se mide ``--repeat`` veces y se conserva el mejor tiempo de cada tramo
+(el ruido de la máquina solo puede sumar tiempo). El informe incluye filas por
+segundo, la memoria pico del proceso y la variación contra una línea base guardada;
+un tramo que empeora más que ``--tolerance`` es una regresión y el comando termina
+con código 1.
+
+Uso::
+
+    python bench.py --scale 100K --scale 1M               # compara con la línea base
+    python bench.py --scale 100K --save-baseline          # actualiza la línea base
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from synth import SCALES, parse_rows, write_csv
+
+BASE_DIR = Path(__file__).resolve().parent
+BENCH_DIR = Path(os.environ.get("BENCH_DIR", BASE_DIR / ".bench"))
+DEFAULT_BASELINE = BASE_DIR / "benchmarks" / "baseline.json"
+DEFAULT_TOLERANCE = 0.2
+# Diferencias menores que esto (en segundos) se consideran ruido.
+MIN_DELTA = 0.01
+
+FILTER_CASES = {
+    "todos": {},
+    "colegio": {"school": ["GP"]},
+    "estrecho": {"school": ["GP"], "sex": ["F"], "age": [16, 17], "internet": [True]},
+}
+SPAN_PREFIXES = ("input:", "chart:", "panel:")
+
+
+def _peak_rss_mb():
+    # ru_maxrss está en KiB en Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _section_label(title):
+    return title.split(" ", 1)[-1]
+
+
+class Timings(dict):
+    """Segundos por tramo."""
+
+    def measure(self, name, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        self[name] = time.perf_counter() - start
+        return value
+
+
+def _run_app(at, context):
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{context}: {at.exception[0].message}")
+
+
+def _app_timings(timings, timeout):
+    """Tiempos de cada sección de ``app.py`` y de sus entradas, gráficos y paneles."""
+    from streamlit.testing.v1 import AppTest
+
+    from instrument import tracer
+
+    def last_rerun():
+        return next(span for span in tracer.last_trace() if span.parent is None).duration
+
+    def collect(after):
+        for span in sorted(tracer.spans, key=lambda span: span.id):
+            if span.id > after and span.name.startswith(SPAN_PREFIXES):
+                timings.setdefault(span.name, span.duration)
+
+    at = AppTest.from_file(str(BASE_DIR / "app.py"), default_timeout=timeout)
+    _run_app(at, "arranque")
+    timings["app:arranque"] = last_rerun()
+    for section in at.radio(key="seccion").options:
+        label = _section_label(section)
+        at.radio(key="seccion").set_value(section)
+        _run_app(at, section)
+        marker = max((span.id for span in tracer.spans), default=0)
+        for toggle in at.toggle:
+            toggle.set_value(True)
+        _run_app(at, section)
+        timings[f"app:{label}"] = last_rerun()
+        _run_app(at, section)
+        timings[f"app:{label}:warm"] = last_rerun()
+        methods = [radio for radio in at.radio if radio.key == "metodo_correlacion"]
+        if methods:
+            methods[0].set_value("Spearman")
+            _run_app(at, (section, "Spearman"))
+            timings[f"app:{label}:spearman"] = last_rerun()
+        collect(marker)
+
+
+def measure(rows, timeout=3600):
+    """Mide todos los tramos en este proceso; usa la fuente y el caché del entorno."""
+    from filters import FilterIndex, age_values
+    from ingest import Summaries
+    from loader import load_dataset
+
+    timings = Timings()
+    timings.measure("load:csv", load_dataset)
+    df = timings.measure("load:arrow", load_dataset)
+    index = timings.measure("filter_index", FilterIndex, df)
+    for case, mapping in FILTER_CASES.items():
+        mapping = {column: age_values((min(v), max(v))) if column == "age" else v
+                   for column, v in mapping.items()}
+        state = index.normalize(mapping)
+        timings.measure(f"filter:{case}", index.select, df, state)
+    timings.measure("summaries", Summaries.from_frame, df)
+    del df
+    _app_timings(timings, timeout)
+    return {"rows": rows, "peak_rss_mb": _peak_rss_mb(), "timings": dict(timings)}
+
+
+def data_path(scale, seed=0):
+    return BENCH_DIR / "data" / f"student-synth-{scale.lower()}-s{seed}.csv"
+
+
+def run_scale(scale, seed=0, timeout=3600, repeat=1):
+    """Genera el CSV de ``scale`` si falta y la mide ``repeat`` veces, cada una en un
+    proceso nuevo con caché vacío; conserva el mínimo de cada tramo."""
+    rows = SCALES.get(scale) or parse_rows(scale)
+    path = data_path(scale, seed)
+    if not path.exists():
+        write_csv(path, rows, seed=seed)
+    runs = [_run_worker(path, rows, timeout) for _ in range(repeat)]
+    timings = {}
+    for run in runs:
+        for name, seconds in run["timings"].items():
+            timings[name] = min(seconds, timings.get(name, seconds))
+    return {"rows": rows, "peak_rss_mb": max(run["peak_rss_mb"] for run in runs), "timings": timings}
+
+
+def _run_worker(path, rows, timeout):
+    with tempfile.TemporaryDirectory(dir=BENCH_DIR) as tmp:
+        env = dict(os.environ, STUDENT_DATA_SOURCE=str(path), STUDENT_CACHE_DIR=tmp, STUDENT_BACKEND="memory")
+        for name in ("RESULT_CACHE_DIR", "INSTRUMENT_JSONL", "INSTRUMENT_PROMETHEUS", "DASHBOARD_ADMIN"):
+            env.pop(name, None)
+        out = Path(tmp) / "result.json"
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--worker", str(rows), "--json", str(out),
+             "--timeout", str(timeout)],
+            env=env, cwd=BASE_DIR, check=True,
+        )
+        return json.loads(out.read_text())
+
+
+def report(results, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """Tabla de tiempos, rendimiento y variación contra ``baseline``."""
+    baseline = baseline or {}
+    rows = []
+    for scale, result in results.items():
+        reference = baseline.get(scale, {}).get("timings", {})
+        for name, seconds in result["timings"].items():
+            base = reference.get(name)
+            change = (seconds - base) / base if base else None
+            rows.append({
+                "scale": scale,
+                "span": name,
+                "seconds": seconds,
+                "rows_per_s": result["rows"] / seconds if seconds else None,
+                "baseline": base,
+                "change": change,
+                "regression": bool(
+                    base is not None and change > tolerance and seconds - base > MIN_DELTA
+                ),
+            })
+    return pd.DataFrame(rows, columns=["scale", "span", "seconds", "rows_per_s", "baseline", "change",
+                                       "regression"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del dashboard con datos sintéticos.")
+    parser.add_argument("--scale", action="append", help="100K, 1M, 10M o un número de filas (repetible)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="guarda estos resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="empeoramiento relativo que cuenta como regresión (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="mediciones por escala (se toma el mínimo)")
+    parser.add_argument("--timeout", type=int, default=3600, help="segundos máximos por rerun de la app")
+    parser.add_argument("-o", "--out", type=Path, help="guarda los resultados en este JSON")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--json", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        args.json.write_text(json.dumps(measure(args.worker, args.timeout)))
+        return
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    results = {}
+    for scale in args.scale or list(SCALES):
+        results[scale] = run_scale(scale, args.seed, args.timeout, args.repeat)
+        print(f"{scale}: memoria pico {results[scale]['peak_rss_mb']:.0f} MB", file=sys.stderr)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    table = report(results, baseline, args.tolerance)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(table.to_string(index=False, float_format=lambda value: f"{value:.4g}"))
+    for scale, result in results.items():
+        print(f"{scale}: {result['rows']} filas, memoria pico {result['peak_rss_mb']:.0f} MB")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"Línea base actualizada en {args.baseline}")
+    elif table["regression"].any():
+        regressions = table[table["regression"]]
+        print(f"{len(regressions)} regresión(es) contra {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Caché de resultados compartido por todas las sesiones del proceso.
+
+Guarda artefactos derivados (agregaciones, matrices, imágenes de gráficos) por
+``(versión de datos, estado de filtros normalizado, id del artefacto, ...)``. Se
+comporta como ``st.cache_data`` con ``ttl`` y ``max_entries``, pero acotado por
+bytes: cada valor se mide al guardarlo, se expulsa el menos usado cuando el total
+supera el límite y las entradas vencen a los ``ttl`` segundos. Lleva contadores de
+aciertos y fallos, y puede tener un nivel en disco para que los resultados
+sobrevivan a un reinicio del servidor.
+
+Cuando varias sesiones piden a la vez el mismo artefacto, :meth:`ResultCache.get_or_compute`
+lo calcula una sola vez y las demás esperan el resultado.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", 256 * 1024 * 1024))
+DEFAULT_TTL = float(os.environ.get("RESULT_CACHE_TTL", 6 * 3600))
+# Nivel en disco opcional: directorio en RESULT_CACHE_DIR (desactivado si no se indica).
+DEFAULT_DISK_DIR = os.environ.get("RESULT_CACHE_DIR") or None
+DEFAULT_DISK_MAX_BYTES = int(os.environ.get("RESULT_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+
+_MISSING = object()
+
+
+def sizeof(value):
+    """Tamaño aproximado en bytes de un resultado."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return sys.getsizeof(value) + sum(sizeof(getattr(value, f.name)) for f in fields(value))
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + sizeof(vars(value))
+    return sys.getsizeof(value)
+
+
+class DiskTier:
+    """Resultados serializados con pickle en un directorio, acotados por bytes y TTL."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_DISK_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def _path(self, key):
+        return self.directory / (hashlib.sha256(repr(key).encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return _MISSING
+            with open(path, "rb") as fh:
+                stored_key, value = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISSING
+        # El nombre es un hash: se confirma que la llave guardada sea la misma.
+        return value if stored_key == key else _MISSING
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                pickle.dump((key, value), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            tmp.unlink(missing_ok=True)
+            return
+        self._prune()
+
+    def _prune(self):
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+class ResultCache:
+    """LRU en memoria acotado por bytes, con TTL, contadores y nivel en disco opcional."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, disk_dir=DEFAULT_DISK_DIR,
+                 disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = DiskTier(disk_dir, disk_max_bytes, ttl) if disk_dir else None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # llave -> (valor, bytes, vence)
+        self._lock = threading.Lock()
+        self._pending = {}  # llave -> threading.Event del cálculo en curso
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return self._lookup(key, count=False) is not _MISSING
+
+    def _lookup(self, key, count=True):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                value, size, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._items.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return value
+                del self._items[key]
+                self.size -= size
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not _MISSING:
+                self._store(key, value)
+                if count:
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                return value
+        if count:
+            with self._lock:
+                self.misses += 1
+        return _MISSING
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def _store(self, key, value, size=None):
+        size = sizeof(value) if size is None else size
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._items[key] = (value, size, expires)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._items.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def put(self, key, value, size=None):
+        self._store(key, value, size)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def get_or_compute(self, key, compute):
+        """Valor de ``key``; si falta, lo calcula una sola vez aunque lo pidan varios hilos."""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        # Un evento por llave en cálculo (no un candado): ``compute`` puede pedir otras
+        # llaves del caché (un gráfico pide sus entradas) sin riesgo de bloqueo mutuo.
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = threading.Event()
+        if not owner:
+            pending.wait()
+        value = self._lookup(key, count=False)
+        if value is not _MISSING:
+            # Otro hilo lo calculó mientras este esperaba: cuenta como acierto.
+            with self._lock:
+                self.misses -= 1
+                self.hits += 1
+            if owner:
+                with self._lock:
+                    del self._pending[key]
+                pending.set()
+            return value
+        if not owner:
+            # El cálculo falló o el valor no cabe en el caché: se calcula aquí.
+            return compute()
+        try:
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+        if disk and self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
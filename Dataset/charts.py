@@ -0,0 +1,124 @@
+"""Gráficos sin estado global: figuras Agg independientes y caché de imágenes.
+
+Las figuras se crean como instancias de :class:`matplotlib.figure.Figure` con su
+propio lienzo Agg, fuera del registro de pyplot y sin importar qué backend esté
+activo, así que cada sesión (o hilo) dibuja sobre objetos propios y no hay
+figuras que cerrar. :data:`TEMPLATES` fija
+tamaños y estilos de uso repetido y :func:`label_bars` etiqueta todas las barras
+de un eje con ``Axes.bar_label``, un contenedor a la vez.
+
+Cada gráfico se identifica por la versión de los datos, el estado de filtros y el id
+del gráfico. La figura se rasteriza una vez y los bytes de la imagen se guardan en
+el caché de resultados compartido (:mod:`cache`).
+"""
+
+import io
+import os
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.container import BarContainer
+from matplotlib.figure import Figure, SubplotParams
+
+DEFAULT_DPI = 100
+# A partir de este número de puntos los scatter se dibujan agregados por celda.
+SCATTER_BIN_THRESHOLD = int(os.environ.get("SCATTER_BIN_THRESHOLD", 5000))
+
+# Plantillas de figura: tamaño en pulgadas y márgenes fijos. Con márgenes fijos la
+# figura se rasteriza en una sola pasada (``bbox_inches="tight"`` dibuja dos veces).
+TEMPLATES = {
+    "bar": {"figsize": (8, 6), "margins": (0.1, 0.12, 0.97, 0.92)},
+    "wide": {"figsize": (10, 6), "margins": (0.08, 0.12, 0.97, 0.92)},
+    # Etiquetas del eje x rotadas 45°: más margen inferior.
+    "wide_rotated": {"figsize": (10, 6), "margins": (0.08, 0.3, 0.97, 0.92)},
+    "xwide": {"figsize": (12, 6), "margins": (0.07, 0.12, 0.98, 0.92)},
+    "row": {"figsize": (18, 5), "margins": (0.05, 0.12, 0.98, 0.85)},
+    "matrix": {"figsize": (12, 10), "margins": (0.1, 0.12, 0.97, 0.95)},
+}
+TITLE_STYLE = {"fontsize": 14, "color": "navy"}
+LABEL_STYLE = {"fontsize": 12}
+
+
+def new_figure(template="bar", nrows=1, ncols=1, **subplot_kw):
+    """Figura con lienzo Agg propio (no pasa por pyplot) y sus ejes."""
+    spec = TEMPLATES[template]
+    left, bottom, right, top = spec["margins"]
+    fig = Figure(
+        figsize=spec["figsize"],
+        subplotpars=SubplotParams(left=left, bottom=bottom, right=right, top=top),
+    )
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols, **subplot_kw)
+
+
+def style(ax, title=None, xlabel=None, ylabel=None):
+    """Aplica el estilo común de título y etiquetas de ejes."""
+    if title is not None:
+        ax.set_title(title, **TITLE_STYLE)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel, **LABEL_STYLE)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel, **LABEL_STYLE)
+    return ax
+
+
+def label_bars(ax, fmt="%.2f", padding=3, **kwargs):
+    """Etiqueta el alto de todas las barras de ``ax`` con ``bar_label``.
+
+    Las barras de alto cero o faltante (combinaciones sin datos) quedan sin etiqueta.
+    """
+    for container in ax.containers:
+        if isinstance(container, BarContainer):
+            values = np.asarray(container.datavalues, dtype=np.float64)
+            labels = [fmt % value if np.isfinite(value) and value != 0 else "" for value in values]
+            ax.bar_label(container, labels=labels, padding=padding, **kwargs)
+
+
+def render(cache, chart_id, key, draw, fmt="png", dpi=DEFAULT_DPI):
+    """Bytes de la imagen de ``chart_id`` desde ``cache`` (un :class:`cache.ResultCache`).
+
+    ``key`` identifica los datos del gráfico (versión y estado de filtros); ``draw``
+    solo se llama si la imagen no está guardada y debe devolver una figura (ver
+    :func:`new_figure`).
+    """
+    return cache.get_or_compute(
+        (*key, f"chart:{chart_id}", fmt, dpi), lambda: rasterize(draw(), fmt=fmt, dpi=dpi)
+    )
+
+
+def rasterize(fig, fmt="png", dpi=DEFAULT_DPI):
+    """Renderiza ``fig`` a bytes en una sola pasada (los márgenes vienen de la plantilla)."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi)
+    return buffer.getvalue()
+
+
+def bin_counts(x, y):
+    """Celdas ``(x, y)`` distintas de dos columnas enteras y cuántos puntos caen en cada una."""
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    if len(x) == 0:
+        return x, y, np.zeros(0, dtype=np.int64)
+    x_min, y_min = x.min(), y.min()
+    height = y.max() - y_min + 1
+    counts = np.bincount((x - x_min) * height + (y - y_min))
+    cells = np.flatnonzero(counts)
+    return cells // height + x_min, cells % height + y_min, counts[cells]
+
+
+def scatter(ax, x, y, threshold=SCATTER_BIN_THRESHOLD, max_size=400, **kwargs):
+    """Scatter que agrega los puntos por celda cuando hay más de ``threshold``.
+
+    En modo agregado cada celda de la malla entera se dibuja una sola vez, con un
+    marcador cuyo tamaño y color dependen del número de estudiantes en la celda, así
+    que el costo de render depende del número de celdas y no del de filas.
+    """
+    if len(x) <= threshold:
+        return ax.scatter(x, y, **kwargs)
+    xs, ys, counts = bin_counts(x, y)
+    kwargs.pop("s", None)
+    kwargs.pop("color", None)
+    sizes = 20 + (max_size - 20) * np.sqrt(counts / counts.max())
+    points = ax.scatter(xs, ys, s=sizes, c=counts, cmap="viridis", **kwargs)
+    ax.figure.colorbar(points, ax=ax, label="Estudiantes")
+    return points
@@ -0,0 +1,135 @@
+"""Matrices de correlación de Pearson y Spearman sobre las columnas numéricas.
+
+Pearson se calcula con una sola multiplicación de matrices a partir de estadísticos
+suficientes (n, suma por columna y matriz de productos cruzados). Esos estadísticos
+se pueden sumar entre lotes de filas, así que la matriz se actualiza de forma
+incremental al agregar datos sin volver a recorrer lo ya procesado. Spearman
+necesita los rangos de todas las filas y se calcula sobre las filas filtradas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import DIMENSIONS
+from schema import NUMERIC
+
+
+class MomentStats:
+    """Estadísticos suficientes de primer y segundo orden de varias columnas."""
+
+    def __init__(self, columns, n=0, sums=None, cross=None):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = n
+        self.sums = np.zeros(k) if sums is None else sums
+        self.cross = np.zeros((k, k)) if cross is None else cross
+
+    @classmethod
+    def from_frame(cls, df, columns=NUMERIC):
+        values = df[list(columns)].to_numpy(dtype=np.float64)
+        return cls(columns, len(values), values.sum(axis=0), values.T @ values)
+
+    def __add__(self, other):
+        if self.columns != other.columns:
+            raise ValueError("Los estadísticos tienen columnas distintas")
+        return MomentStats(
+            self.columns, self.n + other.n, self.sums + other.sums, self.cross + other.cross
+        )
+
+    def means(self):
+        if self.n == 0:
+            return np.full(len(self.columns), np.nan)
+        return self.sums / self.n
+
+    def covariance(self):
+        """Matriz de covarianzas muestrales (ddof=1); NaN con menos de dos filas."""
+        if self.n < 2:
+            return np.full((len(self.columns), len(self.columns)), np.nan)
+        centered = self.cross - np.outer(self.sums, self.sums) / self.n
+        return centered / (self.n - 1)
+
+    def pearson(self):
+        """Matriz de correlación de Pearson como DataFrame."""
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class GroupedMoments:
+    """:class:`MomentStats` por celda de las dimensiones del cubo.
+
+    Permite obtener la matriz de Pearson de cualquier filtro sobre esas dimensiones
+    sumando celdas, sin recorrer las filas.
+    """
+
+    def __init__(self, keys, n, sums, cross, columns, dimensions):
+        self.keys = keys
+        self.n = n
+        self.sums = sums
+        self.cross = cross
+        self.columns = list(columns)
+        self.dimensions = list(dimensions)
+
+    @classmethod
+    def from_frame(cls, df, dimensions=DIMENSIONS, columns=NUMERIC):
+        if df.empty:
+            k = len(columns)
+            keys = df[list(dimensions)].iloc[:0].reset_index(drop=True)
+            return cls(
+                keys, np.zeros(0, dtype=np.int64), np.zeros((0, k)), np.zeros((0, k, k)),
+                columns, dimensions,
+            )
+        grouped = df.groupby(list(dimensions), observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().reset_index()[list(dimensions)]
+        order = np.argsort(codes, kind="stable")
+        values = df[list(columns)].to_numpy(dtype=np.float64)[order]
+        n = np.bincount(codes, minlength=len(keys))
+        starts = np.concatenate([[0], np.cumsum(n)[:-1]])
+        sums = np.add.reduceat(values, starts, axis=0)
+        cross = np.stack([
+            values[start:start + size].T @ values[start:start + size]
+            for start, size in zip(starts, n)
+        ])
+        return cls(keys, n, sums, cross, columns, dimensions)
+
+    def covers(self, state):
+        return set(state.columns()) <= set(self.dimensions)
+
+    def stats(self, state):
+        """:class:`MomentStats` de las filas que cumplen ``state``."""
+        mask = np.ones(len(self.keys), dtype=bool)
+        for column, values in state.selections:
+            mask &= self.keys[column].isin(values).to_numpy()
+        return MomentStats(
+            self.columns, int(self.n[mask].sum()), self.sums[mask].sum(axis=0), self.cross[mask].sum(axis=0)
+        )
+
+    def merge(self, other):
+        """Celdas combinadas de ``self`` y ``other`` (mismas dimensiones y columnas)."""
+        keys = pd.concat([self.keys, other.keys], ignore_index=True)
+        grouped = keys.groupby(self.dimensions, observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        merged_keys = grouped.size().reset_index()
+        size = len(merged_keys)
+        n = np.zeros(size, dtype=np.int64)
+        sums = np.zeros((size, len(self.columns)))
+        cross = np.zeros((size, len(self.columns), len(self.columns)))
+        np.add.at(n, codes, np.concatenate([self.n, other.n]))
+        np.add.at(sums, codes, np.concatenate([self.sums, other.sums]))
+        np.add.at(cross, codes, np.concatenate([self.cross, other.cross]))
+        return GroupedMoments(
+            merged_keys[self.dimensions], n, sums, cross, self.columns, self.dimensions
+        )
+
+
+def spearman_matrix(df, columns=NUMERIC):
+    """Correlación de Spearman: Pearson sobre los rangos promedio de cada columna."""
+    ranks = pd.DataFrame(
+        {column: df[column].rank(method="average") for column in columns}
+    )
+    return MomentStats.from_frame(ranks, columns).pearson()
+
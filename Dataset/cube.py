@@ -0,0 +1,126 @@
+"""Cubo preagregado de notas sobre las dimensiones discretas del dataset.
+
+Cada celda guarda el conteo, la suma y la suma de cuadrados (enteras, exactas) de
+G1, G2 y G3 para una combinación de dimensiones. Cualquier filtro sobre esas
+dimensiones más cualquier agrupación se responde sumando celdas, sin recorrer filas,
+así que el costo depende del número de celdas y no del número de estudiantes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import GRADES
+
+DIMENSIONS = ["school", "sex", "age", "schoolsup", "famsup", "internet", "studytime"]
+MEASURES = GRADES
+
+
+def _sum_columns(measures):
+    return [f"{m}_sum" for m in measures] + [f"{m}_sumsq" for m in measures]
+
+
+class DataCube:
+    """Conteo/suma/suma de cuadrados por celda de ``DIMENSIONS``."""
+
+    def __init__(self, cells, dimensions=DIMENSIONS, measures=MEASURES):
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+
+    @classmethod
+    def from_frame(cls, df, dimensions=DIMENSIONS, measures=MEASURES):
+        values = {m: df[m].to_numpy(dtype=np.int64) for m in measures}
+        frame = df[list(dimensions)].copy()
+        frame["n"] = np.ones(len(df), dtype=np.int64)
+        for m in measures:
+            frame[f"{m}_sum"] = values[m]
+            frame[f"{m}_sumsq"] = values[m] * values[m]
+        cells = (
+            frame.groupby(list(dimensions), observed=True, sort=True)
+            [["n"] + _sum_columns(measures)]
+            .sum()
+            .reset_index()
+        )
+        return cls(cells, dimensions, measures)
+
+    def covers(self, state):
+        """Indica si el cubo puede responder con el filtro ``state``."""
+        return set(state.columns()) <= set(self.dimensions)
+
+    def _filtered_cells(self, state):
+        if not self.covers(state):
+            extra = sorted(set(state.columns()) - set(self.dimensions))
+            raise KeyError(f"El cubo no tiene las dimensiones: {', '.join(extra)}")
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, values in state.selections:
+            mask &= self.cells[column].isin(values).to_numpy()
+        return self.cells[mask]
+
+    def aggregate(self, state, by, measure="G3"):
+        """Conteo, media, varianza y desviación de ``measure`` agrupados por ``by``.
+
+        Los resultados coinciden con ``groupby(by, observed=True)[measure]`` de pandas
+        sobre las filas filtradas.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        cells = self._filtered_cells(state)
+        sums = (
+            cells.groupby(by, observed=True, sort=True)[["n", f"{measure}_sum", f"{measure}_sumsq"]]
+            .sum()
+        )
+        if len(by) == 1:
+            sums.index.name = by[0]
+        n = sums["n"].to_numpy()
+        total = sums[f"{measure}_sum"].to_numpy()
+        total_sq = sums[f"{measure}_sumsq"].to_numpy()
+        # n * sum(x²) - sum(x)² es exacto en enteros; solo la división redondea.
+        spread = (n * total_sq - total * total).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.where(n > 1, spread / (n * (n - 1.0)), np.nan)
+        return pd.DataFrame(
+            {
+                "count": n,
+                "mean": total / n,
+                "var": var,
+                "std": np.sqrt(var),
+            },
+            index=sums.index,
+        )
+
+    def mean(self, state, by, measure="G3"):
+        """Serie equivalente a ``groupby(by, observed=True)[measure].mean()``."""
+        return self.aggregate(state, by, measure)["mean"].rename(measure)
+
+    def merge(self, other):
+        """Cubo resultante de sumar las celdas de ``self`` y ``other``."""
+        combined = pd.concat([self.cells, other.cells], ignore_index=True)
+        cells = (
+            combined.groupby(self.dimensions, observed=True, sort=True)
+            [["n"] + _sum_columns(self.measures)]
+            .sum()
+            .reset_index()
+        )
+        return DataCube(cells, self.dimensions, self.measures)
+
+
+def grouped_mean(cube, rows, state, by, measure="G3"):
+    """Media agrupada desde el cubo cuando cubre el filtro, las columnas de ``by`` y
+    ``measure``; si no, desde las filas.
+
+    ``rows`` es una función que devuelve las filas filtradas; solo se llama cuando
+    el cubo no puede responder.
+    """
+    columns = [by] if isinstance(by, str) else list(by)
+    if cube.covers(state) and set(columns) <= set(cube.dimensions) and measure in cube.measures:
+        return cube.mean(state, by, measure)
+    return rows().groupby(by, observed=True)[measure].mean()
+
+
+def grouped_aggregate(cube, rows, state, by, measure="G3"):
+    """Conteo, media, varianza y desviación agrupados, desde el cubo cuando cubre el
+    filtro y las columnas de ``by``; si no, desde las filas filtradas que da ``rows()``."""
+    by = [by] if isinstance(by, str) else list(by)
+    if cube.covers(state) and set(by) <= set(cube.dimensions) and measure in cube.measures:
+        return cube.aggregate(state, by, measure)
+    grouped = rows().groupby(by, observed=True, sort=True)[measure]
+    return grouped.agg(["count", "mean", "var", "std"])
@@ -0,0 +1,133 @@
+"""Pool de conexiones SQLite de larga vida, compartido por el dashboard y los scripts.
+
+Las conexiones se abren una sola vez, en modo WAL (las lecturas no se bloquean
+detrás de un escritor) y con pragmas ajustados para lectura analítica. Como cada
+conexión conserva su caché de sentencias preparadas, reutilizar el mismo SQL
+parametrizado evita volver a compilarlo en cada consulta.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_POOL_SIZE = 4
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # en KiB: 64 MiB por conexión
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionPool:
+    """Pool seguro entre hilos de conexiones a una base SQLite.
+
+    Las lecturas usan cualquier conexión libre; las escrituras además toman un
+    candado del proceso para que solo haya un escritor a la vez.
+    """
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, pragmas=PRAGMAS, timeout=30.0,
+                 cached_statements=256):
+        self.path = Path(path)
+        self.size = size
+        self.pragmas = dict(pragmas)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path),
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=self.timeout)
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Conexión prestada del pool; se devuelve al salir del bloque."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def writer(self):
+        """Conexión para escribir, serializada entre hilos y dentro de una transacción."""
+        with self._write_lock, self.connection() as conn:
+            with conn:
+                yield conn
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_frame(self, sql, params=()):
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def execute(self, sql, params=()):
+        with self.writer() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, size=DEFAULT_POOL_SIZE):
+    """Pool compartido del proceso para ``path`` (se crea la primera vez)."""
+    key = str(Path(path).resolve())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(path, size=size)
+        return _pools[key]
@@ -0,0 +1,150 @@
+"""Exportación de la selección filtrada y de las tablas agregadas en CSV o Parquet.
+
+Las filas se generan por bloques a partir del bitmap de :class:`filters.FilterIndex`:
+cada bloque toma solo sus filas del DataFrame, se escribe y se descarta. Así la memoria
+usada depende de ``chunk_rows`` y no del tamaño de la selección; no se arma una copia
+filtrada completa ni un texto CSV gigante en memoria.
+
+Los CSV usan el formato del archivo fuente (delimitado por ``;`` y con ``yes``/``no``),
+así que se pueden volver a cargar con ``loader`` o ``ingest``.
+"""
+
+import gzip
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+
+from loader import CSV_DELIMITER, DEFAULT_CHUNK_ROWS
+from schema import to_source
+
+# Formato -> (extensión, tipo MIME).
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "csv": (".csv", "text/csv"),
+}
+PARQUET_COMPRESSION = "zstd"
+GZIP_LEVEL = 5
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", Path(tempfile.gettempdir()) / "student-exports"))
+# Los archivos temporales de descarga se borran pasado este tiempo (segundos).
+EXPORT_TTL = float(os.environ.get("EXPORT_TTL", 3600))
+
+
+def iter_chunks(df, index, state, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Bloques de filas de ``df`` que cumplen ``state`` (al menos uno, aunque sea vacío,
+    para que el archivo lleve las columnas)."""
+    empty = True
+    for positions in index.iter_rows(state, chunk_rows):
+        empty = False
+        yield df.take(positions)
+    if empty:
+        yield df.iloc[:0]
+
+
+def _csv_bytes(frame, header=True):
+    buffer = io.BytesIO()
+    table = pa.Table.from_pandas(to_source(frame), preserve_index=False)
+    if header:
+        # El encabezado del CSV fuente no lleva comillas (pyarrow las pone en todos los nombres).
+        buffer.write((CSV_DELIMITER.join(table.column_names) + "\n").encode())
+    options = pcsv.WriteOptions(include_header=False, delimiter=CSV_DELIMITER, quoting_style="needed")
+    pcsv.write_csv(table, buffer, options)
+    return buffer.getvalue()
+
+
+def iter_csv(chunks):
+    """Bytes CSV por bloques (con encabezado en el primero), para escribir o transmitir."""
+    header = True
+    for chunk in chunks:
+        yield _csv_bytes(chunk, header)
+        header = False
+
+
+def write_csv(chunks, path, compress=False):
+    fh = gzip.open(path, "wb", compresslevel=GZIP_LEVEL) if compress else open(path, "wb")
+    with fh:
+        for data in iter_csv(chunks):
+            fh.write(data)
+
+
+def write_parquet(chunks, path, compression=PARQUET_COMPRESSION):
+    """Escribe los bloques como grupos de filas de un mismo archivo Parquet."""
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_chunks(chunks, path, fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt!r} (usa {', '.join(FORMATS)})")
+    if fmt == "parquet":
+        write_parquet(chunks, path)
+    else:
+        write_csv(chunks, path, compress=fmt == "csv.gz")
+
+
+def _prune(directory, ttl=EXPORT_TTL):
+    for path in directory.glob("export-*"):
+        try:
+            if time.time() - path.stat().st_mtime > ttl:
+                path.unlink(missing_ok=True)
+        except OSError:
+            continue
+
+
+def export_rows(df, index, state, fmt, path=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Escribe la selección en ``path`` (por defecto un archivo temporal) y lo devuelve."""
+    return export_chunks(iter_chunks(df, index, state, chunk_rows), fmt, path)
+
+
+def export_chunks(chunks, fmt, path=None):
+    """Escribe los bloques ``chunks`` en ``path`` (por defecto un archivo temporal) y lo
+    devuelve; sirve para bloques que no salen de un DataFrame (p. ej. del almacén SQLite)."""
+    if path is None:
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        _prune(EXPORT_DIR)
+        handle, path = tempfile.mkstemp(prefix="export-", suffix=FORMATS[fmt][0], dir=EXPORT_DIR)
+        os.close(handle)
+    path = Path(path)
+    try:
+        write_chunks(chunks, path, fmt)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def flat_table(frame):
+    """Tabla con índice y encabezados planos (Parquet exige nombres de columna simples)."""
+    frame = frame.to_frame() if isinstance(frame, pd.Series) else frame.copy()
+    if isinstance(frame.columns, pd.MultiIndex):
+        frame.columns = ["_".join(str(part) for part in column if part != "") for column in frame.columns]
+    if not isinstance(frame.index, pd.RangeIndex) or frame.index.name is not None:
+        frame = frame.reset_index()
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def table_bytes(frame, fmt):
+    """Una tabla agregada (pequeña) serializada en memoria en el formato ``fmt``."""
+    frame = flat_table(frame)
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False, compression=PARQUET_COMPRESSION)
+        return buffer.getvalue()
+    data = _csv_bytes(frame)
+    return gzip.compress(data, GZIP_LEVEL) if fmt == "csv.gz" else data
@@ -0,0 +1,146 @@
+"""Índice de bitmaps para los filtros de la barra lateral.
+
+Al cargar los datos se precalcula un bitmap empaquetado (1 bit por fila) por cada
+valor de cada columna filtrable. Una selección se resuelve con OR entre los valores
+elegidos de una columna y AND entre columnas, sin volver a recorrer el DataFrame.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Columnas que se pueden filtrar desde la barra lateral.
+FILTER_COLUMNS = [
+    "school", "sex", "age", "address", "Mjob", "internet", "failures",
+]
+
+
+@dataclass(frozen=True)
+class FilterState:
+    """Selección normalizada de filtros: ``((columna, (valores...)), ...)``.
+
+    Es inmutable y hashable, de modo que sirve como clave de caché.
+    """
+
+    selections: tuple = ()
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        items = []
+        for column in sorted(mapping):
+            values = tuple(sorted(_plain(value) for value in mapping[column]))
+            items.append((column, values))
+        return cls(tuple(items))
+
+    def as_dict(self):
+        return {column: list(values) for column, values in self.selections}
+
+    def columns(self):
+        return [column for column, _ in self.selections]
+
+
+def _plain(value):
+    """Convierte escalares de NumPy a tipos de Python para hashear de forma estable."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def age_values(age_range):
+    """Expande un rango de edades ``(min, max)`` a la lista de edades incluidas."""
+    low, high = age_range
+    return list(range(int(low), int(high) + 1))
+
+
+def normalize_state(values, mapping):
+    """:class:`FilterState` de ``mapping`` dados los valores de cada columna (``values``)."""
+    restricted = {}
+    for column, selected in mapping.items():
+        if column not in values:
+            raise KeyError(f"Columna no indexada: {column}")
+        selected = {_plain(value) for value in selected}
+        if not set(values[column]) <= selected:
+            restricted[column] = selected
+    return FilterState.from_mapping(restricted)
+
+
+class FilterIndex:
+    """Bitmaps por valor de cada columna filtrable de un DataFrame."""
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.n_rows = len(df)
+        self._values = {}
+        self._bitmaps = {}
+        for column in columns:
+            codes, uniques = _factorize(df[column])
+            self._values[column] = uniques
+            self._bitmaps[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(uniques)
+            }
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    @property
+    def columns(self):
+        return list(self._values)
+
+    def values(self, column):
+        """Valores presentes en ``column``, en orden."""
+        return list(self._values[column])
+
+    def normalize(self, mapping):
+        """Construye un :class:`FilterState` omitiendo las columnas sin restricción.
+
+        Una columna con todos sus valores seleccionados no filtra nada, así que el
+        estado por defecto queda vacío y comparte clave de caché en todas las sesiones.
+        """
+        return normalize_state(self._values, mapping)
+
+    def bitmap(self, state):
+        """Bitmap empaquetado de las filas que cumplen ``state``."""
+        result = self._all
+        for column, values in state.selections:
+            bitmaps = self._bitmaps[column]
+            selected = [bitmaps[value] for value in values if value in bitmaps]
+            if not selected:
+                return np.zeros_like(self._all)
+            column_bitmap = np.bitwise_or.reduce(selected) if len(selected) > 1 else selected[0]
+            result = result & column_bitmap
+        return result
+
+    def rows(self, state):
+        """Posiciones (enteras) de las filas que cumplen ``state``."""
+        if not state.selections:
+            return np.arange(self.n_rows)
+        mask = np.unpackbits(self.bitmap(state), count=self.n_rows).view(bool)
+        return np.flatnonzero(mask)
+
+    def iter_rows(self, state, chunk_rows):
+        """Posiciones de las filas que cumplen ``state``, por bloques de ``chunk_rows``
+        filas del dataset: solo se desempaqueta el tramo del bitmap de cada bloque."""
+        chunk_rows = max(8, chunk_rows // 8 * 8)
+        bitmap = self.bitmap(state) if state.selections else None
+        for start in range(0, self.n_rows, chunk_rows):
+            end = min(start + chunk_rows, self.n_rows)
+            if bitmap is None:
+                yield np.arange(start, end)
+                continue
+            mask = np.unpackbits(bitmap[start // 8:(end + 7) // 8], count=end - start).view(bool)
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                yield positions + start
+
+    def count(self, state):
+        return int(np.bitwise_count(self.bitmap(state)).sum())
+
+    def select(self, df, state):
+        """Filas de ``df`` que cumplen ``state``."""
+        if not state.selections:
+            return df
+        return df.take(self.rows(state))
+
+
+def _factorize(series):
+    """Códigos enteros y valores únicos ordenados de una columna."""
+    if hasattr(series, "cat"):
+        codes = series.cat.codes.to_numpy()
+        return codes, [_plain(value) for value in series.cat.categories]
+    uniques, codes = np.unique(series.to_numpy(), return_inverse=True)
+    return codes, [_plain(value) for value in uniques]
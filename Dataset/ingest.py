@@ -0,0 +1,214 @@
+"""Ingesta por bloques de uno o varios CSV de estudiantes.
+
+Cada bloque se valida con el esquema, se agrega al caché Arrow y/o al almacén
+SQLite, y se suma a los resúmenes (cubo, momentos por celda e histogramas) antes
+de leer el siguiente. La memoria máxima depende del tamaño del bloque y del número
+de celdas de los resúmenes, no del total de filas.
+
+:func:`append` agrega un lote nuevo (por ejemplo las notas de un periodo de un
+colegio) sin tocar lo ya cargado: escribe un segmento Arrow, inserta solo esas
+filas en SQLite y encadena una versión nueva, así que su costo es O(filas nuevas).
+
+Uso::
+
+    python ingest.py "datos/student-*.csv" --db datos/student.db
+    python ingest.py --append datos/student-GP-2025.csv --db datos/student.db
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from correlation import GroupedMoments
+from cube import DataCube
+from loader import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CHUNK_ROWS,
+    cache_path,
+    chain_version,
+    manifest_version,
+    read_chunks,
+    read_manifest,
+    remove_stale,
+    reset_appends,
+    resolve_sources,
+    segment_path,
+    sources_hash,
+    write_cache_chunks,
+    write_manifest,
+)
+from quantiles import GroupedHistogram
+import store
+
+HISTOGRAM_COLUMNS = ["G3", "studytime"]
+
+
+@dataclass
+class Summaries:
+    """Resúmenes sumables del dataset; ``update`` incorpora un bloque de filas."""
+
+    cube: DataCube = None
+    moments: GroupedMoments = None
+    histograms: dict = field(default_factory=dict)
+    rows: int = 0
+    version: str = None
+
+    @classmethod
+    def from_frame(cls, df):
+        summaries = cls(version=df.attrs.get("version"))
+        summaries.update(df)
+        return summaries
+
+    @classmethod
+    def for_frame(cls, df, previous=None):
+        """Resúmenes de ``df``; si ``previous`` corresponde a una versión anterior de
+        ``df.attrs["history"]``, solo se procesan las filas agregadas desde entonces."""
+        for version, rows in df.attrs.get("history", []):
+            if previous is not None and previous.version == version and previous.rows == rows:
+                delta = cls.from_frame(df.iloc[rows:])
+                merged = previous.merge(delta)
+                merged.version = df.attrs.get("version")
+                return merged
+        return cls.from_frame(df)
+
+    def merge(self, other):
+        """Resúmenes combinados de ``self`` y ``other``, sin modificar ninguno."""
+        if not self.rows:
+            return Summaries(other.cube, other.moments, dict(other.histograms), other.rows)
+        if not other.rows:
+            return Summaries(self.cube, self.moments, dict(self.histograms), self.rows)
+        return Summaries(
+            self.cube.merge(other.cube),
+            self.moments.merge(other.moments),
+            {
+                column: histogram.merge(other.histograms[column])
+                for column, histogram in self.histograms.items()
+            },
+            self.rows + other.rows,
+        )
+
+    def update(self, chunk):
+        if not len(chunk):
+            return
+        delta = Summaries(
+            DataCube.from_frame(chunk),
+            GroupedMoments.from_frame(chunk),
+            {column: GroupedHistogram.from_frame(chunk, column) for column in HISTOGRAM_COLUMNS},
+            len(chunk),
+        )
+        merged = self.merge(delta)
+        self.cube, self.moments, self.histograms = merged.cube, merged.moments, merged.histograms
+        self.rows = merged.rows
+
+
+@dataclass
+class IngestResult:
+    version: str
+    rows: int
+    files: list
+    summaries: Summaries
+    cache: Path = None
+
+
+def ingest(source=None, cache_dir=None, pool=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Lee ``source`` por bloques y los escribe en el caché Arrow y, si se indica,
+    en el almacén SQLite de ``pool``. Reemplaza el contenido anterior, incluidos
+    los lotes agregados con :func:`append`."""
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    paths = resolve_sources(source, cache_dir)
+    version = sources_hash(paths)
+    cached = cache_path(version, cache_dir)
+    summaries = Summaries(version=version)
+
+    def chunks():
+        for chunk in read_chunks(paths, chunk_rows):
+            summaries.update(chunk)
+            if pool is not None:
+                with pool.writer() as conn:
+                    store.insert_frame(conn, chunk)
+            yield chunk
+
+    if pool is None:
+        write_cache_chunks(chunks(), cached)
+    else:
+        # Carga completa sin triggers: las tablas resumen se recalculan al final.
+        with pool.writer() as conn:
+            store.begin_load(conn)
+        try:
+            write_cache_chunks(chunks(), cached)
+        finally:
+            with pool.writer() as conn:
+                store.finish_load(conn)
+    remove_stale(cache_dir, cached)
+    reset_appends(cache_dir, version)
+    if pool is not None:
+        with pool.writer() as conn:
+            store.set_version(conn, version)
+    return IngestResult(version, summaries.rows, paths, summaries, cached)
+
+
+def append(delta, base=None, cache_dir=None, pool=None, summaries=None,
+           chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Agrega las filas de ``delta`` (archivo, directorio o patrón) a los datos de ``base``.
+
+    Solo se leen las filas nuevas: se guardan como un segmento Arrow, se insertan en
+    el almacén de ``pool`` (si se indica) y se suman a ``summaries`` (si se indica).
+    Devuelve la versión nueva, que invalida los cachés que dependen de la anterior.
+    """
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    base_version = sources_hash(resolve_sources(base, cache_dir))
+    if not cache_path(base_version, cache_dir).exists():
+        raise FileNotFoundError("No hay caché de la fuente base; ejecuta primero la ingesta completa")
+    manifest = read_manifest(cache_dir, base_version)
+    previous = manifest_version(manifest)
+    paths = resolve_sources(delta, cache_dir)
+    version = chain_version(previous, sources_hash(paths))
+    if pool is not None:
+        with pool.connection() as conn:
+            if store.stored_version(conn) != previous:
+                raise ValueError("El almacén SQLite no está en la versión base del lote")
+    if summaries is None:
+        summaries = Summaries()
+    added = Summaries()
+
+    def chunks():
+        for chunk in read_chunks(paths, chunk_rows):
+            added.update(chunk)
+            if pool is not None:
+                with pool.writer() as conn:
+                    store.insert_frame(conn, chunk)
+            yield chunk
+
+    segment = segment_path(version, cache_dir)
+    rows = write_cache_chunks(chunks(), segment)
+    manifest["segments"].append({"file": segment.name, "rows": rows, "version": version})
+    write_manifest(cache_dir, manifest)
+    if pool is not None:
+        with pool.writer() as conn:
+            store.set_version(conn, version)
+    merged = summaries.merge(added)
+    merged.version = version
+    return IngestResult(version, rows, paths, merged, segment)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta por bloques de CSV de estudiantes.")
+    parser.add_argument("source", nargs="?", help="archivo, directorio, patrón glob o URL")
+    parser.add_argument("--append", help="lote de filas nuevas a agregar sobre la fuente")
+    parser.add_argument("--cache-dir", help="directorio del caché Arrow")
+    parser.add_argument("--db", help="almacén SQLite a actualizar con los datos ingeridos")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    pool = store.open_store(args.db) if args.db else None
+    if args.append:
+        result = append(args.append, args.source, args.cache_dir, pool, chunk_rows=args.chunk_rows)
+        print(f"{result.rows} filas agregadas, versión {result.version[:16]}")
+    else:
+        result = ingest(args.source, args.cache_dir, pool, args.chunk_rows)
+        print(f"{result.rows} filas de {len(result.files)} archivo(s), versión {result.version[:16]}")
+    print(f"caché: {result.cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Medición de tiempos del dashboard por tramos (spans).
+
+Cada tramo registra su duración, la variación de memoria residente del proceso y
+atributos libres (por ejemplo ``cache_hit``). Los tramos se anidan: los que se abren
+dentro de un rerun quedan asociados a él, así que se puede ver qué panel o gráfico
+explica un rerun lento. Los tiempos por nombre se guardan en ventanas acotadas para
+calcular p50/p95, y se pueden exportar como JSONL (un tramo por línea) o como texto
+de Prometheus.
+
+La memoria residente es la del proceso completo: con varias sesiones simultáneas la
+variación de un tramo incluye lo que hagan los otros hilos y es solo orientativa.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Exportación opcional: archivo JSONL con cada tramo y archivo de texto de Prometheus.
+DEFAULT_JSONL_PATH = os.environ.get("INSTRUMENT_JSONL") or None
+DEFAULT_PROMETHEUS_PATH = os.environ.get("INSTRUMENT_PROMETHEUS") or None
+# Directorio de las exportaciones a pedido desde el panel de administración.
+EXPORT_DIR = os.environ.get("INSTRUMENT_DIR", ".instrument")
+WINDOW = 1000
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_current = contextvars.ContextVar("instrument_span", default=None)
+_ids = itertools.count(1)
+
+
+def rss_bytes():
+    """Memoria residente actual del proceso (``None`` fuera de Linux)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class Span:
+    name: str
+    id: int
+    trace: int
+    parent: int = None
+    start: float = 0.0
+    duration: float = None
+    rss_delta: int = None
+    attrs: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """Registro de tramos del proceso, seguro entre hilos."""
+
+    def __init__(self, max_spans=5000, window=WINDOW, jsonl_path=DEFAULT_JSONL_PATH,
+                 prometheus_path=DEFAULT_PROMETHEUS_PATH):
+        self.spans = deque(maxlen=max_spans)
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._durations = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(lambda: [0, 0.0, 0])  # conteo, suma de segundos, aciertos
+        self._lock = threading.Lock()
+        self._jsonl = None
+
+    def start(self, name, root=False, **attrs):
+        """Abre un tramo sin bloque ``with`` (p. ej. el rerun completo); se cierra con :meth:`stop`.
+
+        Con ``root=True`` el tramo no se cuelga del actual aunque haya uno abierto (un
+        rerun interrumpido por Streamlit deja su tramo sin cerrar).
+        """
+        parent = None if root else _current.get()
+        span_id = next(_ids)
+        record = Span(
+            name, span_id, parent.trace if parent else span_id,
+            parent.id if parent else None, time.time(), attrs=dict(attrs),
+        )
+        record._outer = parent
+        _current.set(record)
+        record._rss = rss_bytes()
+        record._clock = time.perf_counter()
+        return record
+
+    def stop(self, record):
+        record.duration = time.perf_counter() - record._clock
+        after = rss_bytes()
+        if record._rss is not None and after is not None:
+            record.rss_delta = after - record._rss
+        _current.set(record._outer)
+        self._record(record)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Mide el bloque; ``attrs`` del tramo devuelto se pueden completar dentro."""
+        record = self.start(name, **attrs)
+        try:
+            yield record
+        finally:
+            self.stop(record)
+
+    def _record(self, record):
+        with self._lock:
+            self.spans.append(record)
+            self._durations[record.name].append(record.duration)
+            totals = self._totals[record.name]
+            totals[0] += 1
+            totals[1] += record.duration
+            totals[2] += bool(record.attrs.get("cache_hit"))
+            if self.jsonl_path:
+                if self._jsonl is None:
+                    Path(self.jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+                    self._jsonl = open(self.jsonl_path, "a", buffering=1, encoding="utf-8")
+                self._jsonl.write(json.dumps(asdict(record), default=str) + "\n")
+        if record.parent is None and self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def trace(self, trace_id):
+        """Tramos de un mismo rerun, en orden de cierre."""
+        with self._lock:
+            return [span for span in self.spans if span.trace == trace_id]
+
+    def last_trace(self, root="rerun"):
+        with self._lock:
+            roots = [span for span in self.spans if span.name == root and span.parent is None]
+        return self.trace(roots[-1].trace) if roots else []
+
+    def summary(self):
+        """Conteo, p50, p95, máximo, memoria media y tasa de aciertos por nombre de tramo."""
+        with self._lock:
+            durations = {name: np.array(values) for name, values in self._durations.items()}
+            totals = {name: list(values) for name, values in self._totals.items()}
+            memory = defaultdict(list)
+            for span in self.spans:
+                if span.rss_delta is not None:
+                    memory[span.name].append(span.rss_delta)
+        rows = [
+            {
+                "span": name,
+                "count": totals[name][0],
+                "p50_ms": np.percentile(values, 50) * 1000,
+                "p95_ms": np.percentile(values, 95) * 1000,
+                "max_ms": values.max() * 1000,
+                "mem_kb": np.mean(memory[name]) / 1024 if memory[name] else np.nan,
+                "hit_rate": totals[name][2] / totals[name][0],
+            }
+            for name, values in durations.items()
+        ]
+        columns = ["span", "count", "p50_ms", "p95_ms", "max_ms", "mem_kb", "hit_rate"]
+        return pd.DataFrame(rows, columns=columns).sort_values("p95_ms", ascending=False)
+
+    def prometheus_text(self):
+        """Resumen de los tramos en el formato de texto de Prometheus."""
+        with self._lock:
+            durations = {name: np.array(values) for name, values in self._durations.items()}
+            totals = {name: list(values) for name, values in self._totals.items()}
+        lines = [
+            "# HELP dashboard_span_seconds Duración de los tramos del dashboard.",
+            "# TYPE dashboard_span_seconds summary",
+        ]
+        for name in sorted(durations):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in (0.5, 0.95, 0.99):
+                value = np.quantile(durations[name], quantile)
+                lines.append(f'dashboard_span_seconds{{span="{label}",quantile="{quantile}"}} {value:.6f}')
+            count, total, _ = totals[name]
+            lines.append(f'dashboard_span_seconds_sum{{span="{label}"}} {total:.6f}')
+            lines.append(f'dashboard_span_seconds_count{{span="{label}"}} {count}')
+        lines += [
+            "# HELP dashboard_span_cache_hits_total Tramos resueltos desde el caché.",
+            "# TYPE dashboard_span_cache_hits_total counter",
+        ]
+        for name in sorted(totals):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'dashboard_span_cache_hits_total{{span="{label}"}} {totals[name][2]}')
+        return "\n".join(lines) + "\n"
+
+    def export_jsonl(self, path):
+        """Escribe los tramos retenidos en ``path``, uno por línea."""
+        with self._lock:
+            lines = [json.dumps(asdict(span), default=str) for span in self.spans]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n" if lines else "", encoding="utf-8")
+
+    def write_prometheus(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(self.prometheus_text(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# Registro compartido por todo el proceso (los módulos no se recargan entre reruns).
+tracer = Tracer()
+span = tracer.span
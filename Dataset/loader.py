@@ -0,0 +1,298 @@
+"""Carga local y versionada del dataset de estudiantes.
+
+El CSV fuente se convierte una sola vez a un caché columnar (Arrow IPC) cuyo
+nombre incluye el hash del contenido de la fuente. Los arranques siguientes
+abren ese caché con memory-map y solo lo reconstruyen cuando el hash cambia,
+por lo que el arranque en frío no necesita red.
+
+La fuente puede ser un archivo, una URL, un directorio o un patrón glob (por
+ejemplo un ``student-*.csv`` por colegio y año). Los CSV se leen por bloques de
+``DEFAULT_CHUNK_ROWS`` filas y cada bloque se escribe al caché apenas se valida,
+así que construir el caché no necesita tener toda la fuente en memoria.
+
+Las filas agregadas después (ver ``ingest.append``) se guardan como segmentos Arrow
+aparte, listados en ``appends-<fuente base>.json`` junto con la versión resultante de
+cada uno; la fuente base no se vuelve a leer. Como cada fuente tiene su propio
+manifiesto, varios procesos con fuentes distintas pueden compartir el directorio de
+caché sin pisarse.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from schema import coerce, read_csv_kwargs
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Fuente por defecto: el CSV versionado en la raíz del repositorio.
+# Se puede sobreescribir con una ruta local o una URL en STUDENT_DATA_SOURCE.
+DEFAULT_SOURCE = os.environ.get(
+    "STUDENT_DATA_SOURCE", str(BASE_DIR.parent / "student-por.csv")
+)
+DEFAULT_CACHE_DIR = Path(os.environ.get("STUDENT_CACHE_DIR", BASE_DIR / ".cache"))
+
+CSV_DELIMITER = ";"
+SOURCE_PATTERN = "student-*.csv"
+DEFAULT_CHUNK_ROWS = int(os.environ.get("STUDENT_CHUNK_ROWS", 100_000))
+MANIFEST = "appends-{}.json"
+# Cachés base de otras fuentes sin usar durante este tiempo (segundos) se borran al
+# reconstruir; se pueden volver a generar desde su fuente.
+STALE_AFTER = float(os.environ.get("STUDENT_CACHE_STALE_AFTER", 7 * 24 * 3600))
+_HASH_CHUNK = 1 << 20
+_hash_memo = {}
+
+
+def file_hash(path):
+    """Hash SHA-256 del contenido de un archivo, leído por bloques.
+
+    Se recuerda por ruta, tamaño y fecha de modificación, así que consultar la
+    versión de un archivo que no cambió no lo vuelve a leer.
+    """
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_CHUNK), b""):
+                digest.update(block)
+        _hash_memo[key] = digest.hexdigest()
+    return _hash_memo[key]
+
+
+def _tmp_path(path):
+    """Archivo temporal junto a ``path``, propio de este proceso e hilo: el dashboard y
+    el API pueden construir el mismo caché a la vez sin escribir en el mismo archivo."""
+    return path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def resolve_source(source=None, cache_dir=None):
+    """Devuelve la ruta local de la fuente, descargándola una vez si es una URL."""
+    source = str(source or DEFAULT_SOURCE)
+    if not source.startswith(("http://", "https://")):
+        return Path(source)
+
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    local = cache_dir / ("source-" + hashlib.sha256(source.encode()).hexdigest()[:16] + ".csv")
+    if not local.exists():
+        tmp = _tmp_path(local)
+        with urllib.request.urlopen(source) as response, open(tmp, "wb") as out:
+            shutil.copyfileobj(response, out)
+        os.replace(tmp, local)
+    return local
+
+
+def resolve_sources(source=None, cache_dir=None):
+    """Lista ordenada de archivos locales de la fuente.
+
+    Un directorio se expande a sus ``student-*.csv`` y un patrón con comodines a los
+    archivos que coinciden; cualquier otra fuente se resuelve con :func:`resolve_source`.
+    """
+    source = str(source or DEFAULT_SOURCE)
+    if source.startswith(("http://", "https://")):
+        return [resolve_source(source, cache_dir)]
+    if Path(source).is_dir():
+        source = str(Path(source) / SOURCE_PATTERN)
+    if glob.has_magic(source):
+        paths = sorted(Path(p) for p in glob.glob(source))
+        if not paths:
+            raise FileNotFoundError(f"Ningún archivo coincide con {source}")
+        return paths
+    return [Path(source)]
+
+
+def sources_hash(paths):
+    """Versión de un conjunto de archivos: el hash de un solo archivo, o de la lista de
+    nombres y hashes cuando hay varios."""
+    if len(paths) == 1:
+        return file_hash(paths[0])
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{Path(path).name}\0{file_hash(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def read_source(path):
+    """Lee el CSV fuente (delimitado por ';') aplicando y validando el esquema."""
+    return coerce(pd.read_csv(path, delimiter=CSV_DELIMITER, **read_csv_kwargs()))
+
+
+def read_chunks(paths, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Bloques de a lo sumo ``chunk_rows`` filas, ya validados, de todos los ``paths``.
+
+    Acepta rutas o archivos abiertos. La memoria usada depende del tamaño del bloque
+    y no del total de filas.
+    """
+    for path in paths:
+        reader = pd.read_csv(
+            path, delimiter=CSV_DELIMITER, chunksize=chunk_rows, **read_csv_kwargs()
+        )
+        with reader:
+            for chunk in reader:
+                yield coerce(chunk).reset_index(drop=True)
+
+
+def cache_path(version, cache_dir=None):
+    return Path(cache_dir or DEFAULT_CACHE_DIR) / f"student-por-{version[:16]}.arrow"
+
+
+def write_cache_chunks(chunks, path):
+    """Escribe bloques sucesivos en un mismo archivo Arrow IPC y devuelve el total de filas.
+
+    Todos los bloques tienen el mismo esquema (las categorías son fijas), así que
+    cada uno se agrega como record batches sin reescribir lo anterior.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    rows = 0
+    writer = None
+    try:
+        with pa.OSFile(str(tmp), "wb") as sink:
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = ipc.new_file(sink, table.schema)
+                    writer.write_table(table)
+                    rows += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+        if writer is None:
+            raise ValueError("La fuente no tiene filas")
+        # Reemplazo atómico: otro proceso nunca ve un caché a medio escribir.
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return rows
+
+
+def read_cache(path):
+    """Abre el caché Arrow con memory-map y lo convierte a pandas sin copiarlo al heap.
+
+    Con ``split_blocks`` cada columna queda en su propio bloque, así que las enteras
+    (y los códigos de las categóricas) son vistas de solo lectura sobre el archivo
+    mapeado; solo las yes/no (bits en Arrow) se copian al convertirse a ``bool``.
+    """
+    with pa.memory_map(str(path), "r") as source:
+        table = ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def touch(path):
+    """Marca el caché como usado (lo consulta :func:`remove_stale`)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def remove_stale(cache_dir, keep, max_age=STALE_AFTER):
+    """Borra los cachés base de otras fuentes sin usar hace más de ``max_age`` segundos.
+
+    Otro proceso con otra fuente puede estar usando el mismo directorio, así que un
+    caché reciente no se toca. Los segmentos agregados y sus manifiestos no se pueden
+    reconstruir y nunca se borran aquí (solo con :func:`reset_appends`).
+    """
+    now = time.time()
+    for old in Path(cache_dir).glob("student-por-*.arrow"):
+        if old == keep:
+            continue
+        try:
+            if now - old.stat().st_mtime <= max_age:
+                continue
+        except OSError:
+            continue
+        old.unlink(missing_ok=True)
+
+
+def chain_version(version, delta):
+    """Versión resultante de agregar a ``version`` un lote cuyo hash es ``delta``."""
+    return hashlib.sha256(f"{version}+{delta}".encode()).hexdigest()
+
+
+def segment_path(version, cache_dir=None):
+    return Path(cache_dir or DEFAULT_CACHE_DIR) / f"append-{version[:16]}.arrow"
+
+
+def manifest_path(cache_dir, base):
+    return Path(cache_dir) / MANIFEST.format(base[:16])
+
+
+def read_manifest(cache_dir, base):
+    """Segmentos agregados sobre la fuente base ``base`` (solo lectura)."""
+    path = manifest_path(cache_dir, base)
+    if path.exists():
+        manifest = json.loads(path.read_text())
+        if manifest["base"] == base:
+            return manifest
+    return {"base": base, "segments": []}
+
+
+def reset_appends(cache_dir, base):
+    """Borra los segmentos agregados sobre ``base`` y su manifiesto."""
+    path = manifest_path(cache_dir, base)
+    if path.exists():
+        for segment in json.loads(path.read_text())["segments"]:
+            (Path(cache_dir) / segment["file"]).unlink(missing_ok=True)
+        path.unlink()
+
+
+def write_manifest(cache_dir, manifest):
+    path = manifest_path(cache_dir, manifest["base"])
+    tmp = _tmp_path(path)
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, path)
+
+
+def manifest_version(manifest):
+    segments = manifest["segments"]
+    return segments[-1]["version"] if segments else manifest["base"]
+
+
+def dataset_version(source=None, cache_dir=None):
+    """Versión actual de los datos (fuente base más segmentos), sin cargarlos."""
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    base = sources_hash(resolve_sources(source, cache_dir))
+    return manifest_version(read_manifest(cache_dir, base))
+
+
+def load_dataset(source=None, cache_dir=None):
+    """Carga el dataset desde el caché columnar, reconstruyéndolo si la fuente cambió.
+
+    La versión (hash de la fuente, encadenado con el de cada lote agregado) queda en
+    ``df.attrs["version"]``; ``df.attrs["history"]`` lista las versiones anteriores
+    con el número de filas que tenía cada una, para actualizar resúmenes solo con
+    las filas nuevas.
+    """
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+    paths = resolve_sources(source, cache_dir)
+    base = sources_hash(paths)
+    cached = cache_path(base, cache_dir)
+
+    if not cached.exists():
+        write_cache_chunks(read_chunks(paths), cached)
+        remove_stale(cache_dir, cached)
+    else:
+        touch(cached)
+    frames = [read_cache(cached)]
+    history = [(base, len(frames[0]))]
+    for segment in read_manifest(cache_dir, base)["segments"]:
+        frames.append(read_cache(cache_dir / segment["file"]))
+        history.append((segment["version"], history[-1][1] + segment["rows"]))
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    df.attrs["version"] = history[-1][0]
+    df.attrs["history"] = history[:-1]
+    return df
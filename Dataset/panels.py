@@ -0,0 +1,118 @@
+"""Registro de secciones y paneles del dashboard con cálculo perezoso.
+
+Cada panel declara por nombre las entradas que necesita. Las entradas las calculan
+proveedores registrados, solo cuando algún panel abierto las pide, y se guardan en
+un :class:`cache.ResultCache` por ``(versión de datos, estado de filtros, entrada)``
+para reutilizarlas entre reruns y sesiones.
+
+Cada entrada y cada panel abierto se mide con :mod:`instrument` (``input:<nombre>``
+con ``cache_hit`` y ``panel:<key>``), para ubicar el panel que vuelve lento un rerun.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from cache import ResultCache
+from instrument import span
+
+
+@dataclass
+class Panel:
+    key: str
+    title: str
+    render: callable
+    inputs: tuple = ()
+    lazy: bool = True
+
+
+@dataclass
+class Section:
+    title: str
+    render: callable = None
+    panels: list = field(default_factory=list)
+
+
+
+class PanelRegistry:
+    def __init__(self, memo=None):
+        self.sections = OrderedDict()
+        self.providers = {}
+        self.memo = memo if memo is not None else ResultCache()
+
+    def _section(self, title):
+        if title not in self.sections:
+            self.sections[title] = Section(title)
+        return self.sections[title]
+
+    def section(self, title):
+        """Registra el encabezado de una sección (lo que se muestra antes de sus paneles)."""
+        def decorator(render):
+            self._section(title).render = render
+            return render
+        return decorator
+
+    def panel(self, section, title, inputs=(), key=None, lazy=True):
+        """Registra un panel. ``render`` recibe las entradas declaradas como argumentos.
+
+        Los paneles con ``lazy=False`` son contenido estático dentro de un expander normal.
+        """
+        def decorator(render):
+            panel = Panel(key or render.__name__, title, render, tuple(inputs), lazy)
+            self._section(section).panels.append(panel)
+            return render
+        return decorator
+
+    def input(self, name, cache=True):
+        """Registra el proveedor de una entrada; recibe el :class:`PanelContext`.
+
+        Con ``cache=False`` el resultado solo se reutiliza dentro del mismo rerun
+        (útil para objetos grandes como el DataFrame filtrado).
+        """
+        def decorator(provider):
+            self.providers[name] = (provider, cache)
+            return provider
+        return decorator
+
+    def render(self, section, ctx):
+        current = self.sections[section]
+        if current.render is not None:
+            with span("section", section=section):
+                current.render()
+        for panel in current.panels:
+            if not panel.lazy:
+                with st.expander(panel.title, expanded=False):
+                    panel.render()
+                continue
+            if st.toggle(panel.title, key=f"panel_{panel.key}"):
+                with st.container(border=True), span(f"panel:{panel.key}"):
+                    panel.render(*[ctx.get(name) for name in panel.inputs])
+
+
+class PanelContext:
+    """Entradas de los paneles para una versión de datos y un estado de filtros."""
+
+    def __init__(self, registry, version, state, **values):
+        self.registry = registry
+        self.version = version
+        self.state = state
+        self._values = dict(values)
+
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        provider, cache = self.registry.providers[name]
+        with span(f"input:{name}") as record:
+            if cache:
+                def compute():
+                    record.attrs["cache_hit"] = False
+                    return provider(self)
+
+                record.attrs["cache_hit"] = True
+                key = (self.version, self.state, name)
+                value = self.registry.memo.get_or_compute(key, compute)
+            else:
+                value = provider(self)
+        self._values[name] = value
+        return value
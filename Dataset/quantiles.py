@@ -0,0 +1,116 @@
+"""Resúmenes de cinco números por grupo para los diagramas de caja.
+
+Las columnas que se grafican (notas, horas de estudio) son enteros de dominio
+pequeño, así que un histograma por grupo es un resumen exacto y sumable: los
+cuartiles, bigotes y valores atípicos que calcula ``matplotlib.cbook.boxplot_stats``
+se obtienen del histograma sin ordenar filas, y los histogramas de varios grupos
+(o de lotes de datos nuevos) se combinan sumando conteos.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import DIMENSIONS
+from schema import INTEGER_RANGES
+
+
+class GroupedHistogram:
+    """Conteos de ``column`` por valor entero y por celda de ``dimensions``."""
+
+    def __init__(self, keys, counts, column, dimensions, low):
+        self.keys = keys
+        self.counts = counts
+        self.column = column
+        self.dimensions = list(dimensions)
+        self.low = low
+
+    @classmethod
+    def from_frame(cls, df, column, dimensions=DIMENSIONS):
+        dimensions = [d for d in dimensions if d != column]
+        low, high = INTEGER_RANGES[column]
+        bins = high - low + 1
+        grouped = df.groupby(dimensions, observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        keys = grouped.size().reset_index()[dimensions]
+        offsets = codes * bins + (df[column].to_numpy(dtype=np.int64) - low)
+        counts = np.bincount(offsets, minlength=len(keys) * bins).reshape(len(keys), bins)
+        return cls(keys, counts, column, dimensions, low)
+
+    @property
+    def values(self):
+        return np.arange(self.low, self.low + self.counts.shape[1])
+
+    def covers(self, state):
+        return set(state.columns()) <= set(self.dimensions)
+
+    def histogram(self, state=None, **where):
+        """Histograma de las filas que cumplen ``state`` y las igualdades ``where``."""
+        mask = np.ones(len(self.keys), dtype=bool)
+        selections = list(state.selections) if state is not None else []
+        selections += [(column, (value,)) for column, value in where.items()]
+        for column, values in selections:
+            mask &= self.keys[column].isin(values).to_numpy()
+        return self.counts[mask].sum(axis=0)
+
+    def merge(self, other):
+        keys = pd.concat([self.keys, other.keys], ignore_index=True)
+        grouped = keys.groupby(self.dimensions, observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        merged_keys = grouped.size().reset_index()[self.dimensions]
+        counts = np.zeros((len(merged_keys), self.counts.shape[1]), dtype=np.int64)
+        np.add.at(counts, codes, np.concatenate([self.counts, other.counts]))
+        return GroupedHistogram(merged_keys, counts, self.column, self.dimensions, self.low)
+
+
+def _value_at(values, cumulative, rank):
+    """Valor en la posición ``rank`` (base 0) de los datos ordenados."""
+    return values[np.searchsorted(cumulative, rank, side="right")]
+
+
+def percentile(values, counts, q):
+    """Percentil ``q`` (0-100) con interpolación lineal, igual que ``np.percentile``."""
+    cumulative = np.cumsum(counts)
+    position = q / 100 * (cumulative[-1] - 1)
+    lower = int(np.floor(position))
+    low_value = _value_at(values, cumulative, lower)
+    high_value = _value_at(values, cumulative, min(lower + 1, cumulative[-1] - 1))
+    return low_value + (position - lower) * (high_value - low_value)
+
+
+def box_stats(values, counts, label=None, whis=1.5):
+    """Estadísticos de un diagrama de caja en el formato de ``Axes.bxp``.
+
+    Los valores atípicos se devuelven una sola vez por valor distinto (se dibujan
+    en la misma posición), lo que mantiene acotado el número de marcadores.
+    """
+    values = np.asarray(values)
+    counts = np.asarray(counts)
+    present = counts > 0
+    if not present.any():
+        return {
+            "label": label, "mean": np.nan, "med": np.nan, "q1": np.nan, "q3": np.nan,
+            "iqr": np.nan, "cilo": np.nan, "cihi": np.nan,
+            "whislo": np.nan, "whishi": np.nan, "fliers": np.array([]),
+        }
+    n = counts.sum()
+    q1, med, q3 = (percentile(values, counts, q) for q in (25, 50, 75))
+    iqr = q3 - q1
+    observed = values[present]
+    inside_high = observed[observed <= q3 + whis * iqr]
+    inside_low = observed[observed >= q1 - whis * iqr]
+    whishi = max(inside_high.max(), q3) if len(inside_high) else q3
+    whislo = min(inside_low.min(), q1) if len(inside_low) else q1
+    notch = 1.57 * iqr / np.sqrt(n)
+    return {
+        "label": label,
+        "mean": float((values * counts).sum() / n),
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "iqr": iqr,
+        "cilo": med - notch,
+        "cihi": med + notch,
+        "whislo": whislo,
+        "whishi": whishi,
+        "fliers": observed[(observed < whislo) | (observed > whishi)],
+    }
@@ -0,0 +1,134 @@
+"""Regresiones por mínimos cuadrados a partir de estadísticos suficientes.
+
+Los ajustes se resuelven en forma cerrada con las sumas y productos cruzados de
+:class:`correlation.MomentStats`, sin volver a recorrer las filas, así que una vez
+obtenidos los estadísticos de un filtro cada ajuste cuesta O(1) en número de filas.
+"""
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+
+def t_quantile(p, df):
+    """Cuantil ``p`` de la t de Student con ``df`` grados de libertad.
+
+    Expansión de Cornish-Fisher sobre el cuantil normal; el error es despreciable
+    para ``df >= 3``, que es lo que interesa en las bandas de confianza.
+    """
+    z = NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z**3 + z) / (4 * df)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+    )
+
+
+@dataclass(frozen=True)
+class LinearFit:
+    """Recta ``y = slope * x + intercept`` ajustada por mínimos cuadrados."""
+
+    slope: float
+    intercept: float
+    r2: float
+    n: int
+    residual_std: float
+    x_mean: float
+    sxx: float
+
+    def predict(self, x):
+        return self.slope * np.asarray(x, dtype=np.float64) + self.intercept
+
+    def endpoints(self, x_min, x_max):
+        """Los dos puntos necesarios para dibujar la recta entre ``x_min`` y ``x_max``."""
+        xs = np.array([x_min, x_max], dtype=np.float64)
+        return xs, self.predict(xs)
+
+    def band(self, x, level=0.95):
+        """Banda de confianza de la media de ``y`` en los puntos ``x``."""
+        x = np.asarray(x, dtype=np.float64)
+        if not self.sxx > 0:
+            return np.full_like(x, np.nan), np.full_like(x, np.nan)
+        t = t_quantile(0.5 + level / 2, max(self.n - 2, 1))
+        half = t * self.residual_std * np.sqrt(1 / self.n + (x - self.x_mean) ** 2 / self.sxx)
+        fitted = self.predict(x)
+        return fitted - half, fitted + half
+
+
+def fit_line(stats, x, y):
+    """Ajuste de ``y`` sobre ``x`` con los estadísticos de ``stats``."""
+    i, j = stats.columns.index(x), stats.columns.index(y)
+    n = stats.n
+    if n == 0:
+        return LinearFit(np.nan, np.nan, np.nan, 0, np.nan, np.nan, np.nan)
+    mean_x, mean_y = stats.sums[i] / n, stats.sums[j] / n
+    sxx = stats.cross[i, i] - n * mean_x * mean_x
+    syy = stats.cross[j, j] - n * mean_y * mean_y
+    sxy = stats.cross[i, j] - n * mean_x * mean_y
+    # Sin variación en x la recta no está definida: queda en NaN.
+    slope = sxy / sxx if sxx > 0 else np.nan
+    intercept = mean_y - slope * mean_x
+    sse = max(syy - slope * sxy, 0.0)
+    r2 = 1 - sse / syy if syy > 0 else np.nan
+    residual_std = np.sqrt(sse / (n - 2)) if n > 2 else np.nan
+    return LinearFit(
+        float(slope), float(intercept), float(r2), n, float(residual_std), float(mean_x), float(sxx)
+    )
+
+
+@dataclass(frozen=True)
+class MultipleFit:
+    """Ajuste lineal de ``y`` sobre varias variables (con intercepto).
+
+    ``dropped`` son las variables constantes en los datos: no se distinguen del
+    intercepto, así que quedan con coeficiente 0.
+    """
+
+    intercept: float
+    coefficients: dict
+    r2: float
+    n: int
+    dropped: tuple = ()
+
+    def predict(self, df):
+        result = np.full(len(df), self.intercept, dtype=np.float64)
+        for column, coefficient in self.coefficients.items():
+            result += coefficient * df[column].to_numpy(dtype=np.float64)
+        return result
+
+
+def fit_multiple(stats, xs, y):
+    """Resuelve las ecuaciones normales de ``y ~ xs`` a partir de ``stats``.
+
+    Se resuelven por mínimos cuadrados (``lstsq``) y no con ``solve``: con pocas filas
+    o variables colineales ``X^T X`` es singular y el ajuste igual debe devolverse.
+    """
+    xs = list(xs)
+    n = stats.n
+    if n == 0:
+        return MultipleFit(np.nan, dict.fromkeys(xs, np.nan), np.nan, 0, tuple(xs))
+    j = stats.columns.index(y)
+    idx = np.array([stats.columns.index(x) for x in xs], dtype=int)
+    diagonal = stats.cross[idx, idx]
+    variance = diagonal - stats.sums[idx] ** 2 / n
+    constant = variance <= 1e-12 * np.maximum(diagonal, 1.0)
+    kept = idx[~constant]
+    # Matriz X^T X con la columna de unos del intercepto.
+    xtx = np.empty((len(kept) + 1, len(kept) + 1))
+    xtx[0, 0] = n
+    xtx[0, 1:] = xtx[1:, 0] = stats.sums[kept]
+    xtx[1:, 1:] = stats.cross[np.ix_(kept, kept)]
+    xty = np.concatenate([[stats.sums[j]], stats.cross[kept, j]])
+    beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+
+    mean_y = stats.sums[j] / n
+    syy = stats.cross[j, j] - n * mean_y * mean_y
+    # SSE = y'y - beta' X'y
+    sse = max(stats.cross[j, j] - beta @ xty, 0.0)
+    r2 = 1 - sse / syy if syy > 0 else np.nan
+    coefficients = dict.fromkeys(xs, 0.0)
+    coefficients.update(zip([x for x, skip in zip(xs, constant) if not skip], beta[1:].tolist()))
+    dropped = tuple(x for x, skip in zip(xs, constant) if skip)
+    return MultipleFit(float(beta[0]), coefficients, float(r2), n, dropped)
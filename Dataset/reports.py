@@ -0,0 +1,207 @@
+"""Reportes por segmento en lote, sin Colab ni Streamlit.
+
+Genera, para cada segmento del dataset (por colegio, por archivo de origen, por
+cualquier combinación de columnas), los gráficos y tablas del análisis del
+cuaderno: PNG por gráfico, CSV por tabla y un ``index.html`` que los reúne. Los
+segmentos se reparten entre procesos, uno por núcleo por defecto.
+
+Uso::
+
+    python reports.py "datos/student-*.csv" --by school --by file -o reportes/
+"""
+
+import argparse
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregations import grade_summary
+from charts import DEFAULT_DPI, label_bars, new_figure, rasterize, scatter, style
+from correlation import MomentStats
+from loader import read_chunks, resolve_sources
+from quantiles import box_stats
+from regression import fit_line
+from schema import INTEGER_RANGES, YES_NO, YES_NO_LABELS
+
+# Segmentación especial: el archivo de origen (p. ej. un CSV por colegio y año).
+FILE_SEGMENT = "file"
+
+
+def load_frames(source=None, by=()):
+    """Dataset completo; con ``file`` en ``by`` agrega la columna ``file`` con el
+    nombre del CSV de cada fila."""
+    paths = resolve_sources(source)
+    if FILE_SEGMENT not in by:
+        return pd.concat(read_chunks(paths), ignore_index=True)
+    frames = []
+    for path in paths:
+        frame = pd.concat(read_chunks([path]), ignore_index=True)
+        frame[FILE_SEGMENT] = Path(path).stem
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _label(column, value):
+    return YES_NO_LABELS[bool(value)] if column in YES_NO else str(value)
+
+
+def segment_name(by, key):
+    parts = [f"{column}-{_label(column, value)}" for column, value in zip(by, key)]
+    return re.sub(r"[^\w.-]+", "_", "_".join(parts)) or "todos"
+
+
+def segments(df, by):
+    """Pares ``(nombre, filas)`` de cada combinación de valores de ``by``."""
+    by = list(by)
+    if not by:
+        yield "todos", df
+        return
+    for key, frame in df.groupby(by, observed=True, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        yield segment_name(by, key), frame.reset_index(drop=True)
+
+
+def _bar_means(df, by, title, xlabel, colors):
+    fig, ax = new_figure("wide")
+    means = df.groupby(by, observed=True)["G3"].mean().unstack()
+    means.plot(kind="bar", ax=ax, color=colors[: means.shape[1]])
+    style(ax, title, xlabel, "Nota Promedio (G3)")
+    label_bars(ax, fmt="%.1f", fontsize=9)
+    return fig
+
+
+def _studytime_scatter(df):
+    fig, ax = new_figure("bar")
+    scatter(ax, df["studytime"], df["G3"], alpha=0.6)
+    style(
+        ax, "Relación entre horas de estudio y Nota final (G3)",
+        "Horas de estudio semanales (studytime)", "Nota final (G3)",
+    )
+    return fig
+
+
+def _absences_regression(df):
+    fig, ax = new_figure("bar")
+    scatter(ax, df["absences"], df["G3"], s=30, alpha=0.6)
+    stats = MomentStats.from_frame(df, ["absences", "G3"])
+    if len(df) > 2 and df["absences"].nunique() > 1:
+        fit = fit_line(stats, "absences", "G3")
+        xs = np.linspace(df["absences"].min(), df["absences"].max(), 50)
+        low, high = fit.band(xs)
+        ax.plot(xs, fit.predict(xs), color="red", label=f"pendiente {fit.slope:.3f}")
+        ax.fill_between(xs, low, high, color="red", alpha=0.15)
+        ax.legend()
+    style(ax, "Relación entre las Ausencias y la Nota final (G3)", "Ausencias", "Nota final (G3)")
+    return fig
+
+
+def _support_boxplots(df):
+    low, high = INTEGER_RANGES["G3"]
+    values = np.arange(low, high + 1)
+    fig, axes = new_figure("row", 1, 3, sharey=True)
+    for ax, (column, title) in zip(axes, [
+        ("schoolsup", "Apoyo Escolar"), ("famsup", "Apoyo Familiar"), ("internet", "Acceso a Internet"),
+    ]):
+        stats = [
+            box_stats(
+                values,
+                np.bincount(
+                    df.loc[df[column] == flag, "G3"].to_numpy(np.int64) - low, minlength=len(values)
+                ),
+                label=YES_NO_LABELS[flag],
+            )
+            for flag in (False, True)
+        ]
+        ax.bxp([s for s in stats if not np.isnan(s["med"])])
+        style(ax, title)
+    style(axes[0], ylabel="Nota final (G3)")
+    return fig
+
+
+CHARTS = {
+    "g3_colegio_sexo": lambda df: _bar_means(
+        df, ["school", "sex"], "Relación entre Sexo y Nota Final (G3) por Colegio", "Colegio",
+        ["#FF6347", "#4682B4"],
+    ),
+    "g3_edad_sexo": lambda df: _bar_means(
+        df, ["age", "sex"], "Nota Final (G3) por Edad y Sexo", "Edad", ["#90EE90", "#FFB6C1"],
+    ),
+    "estudio_g3": _studytime_scatter,
+    "ausencias_g3": _absences_regression,
+    "apoyo_g3": _support_boxplots,
+}
+
+TABLES = {
+    "resumen": lambda df: df.describe(),
+    "notas_sexo_edad": lambda df: grade_summary(df, ["sex", "age"]),
+    "g3_apoyo": lambda df: grade_summary(df, ["schoolsup", "famsup"], grades=["G3"]),
+}
+
+
+def render_segment(task):
+    """Escribe los gráficos, tablas e ``index.html`` de un segmento (corre en un proceso)."""
+    name, df, out_dir, dpi = task
+    target = Path(out_dir) / name
+    target.mkdir(parents=True, exist_ok=True)
+    body = [f"<h1>{html.escape(name)}</h1>", f"<p>{len(df)} estudiantes</p>"]
+    for chart, draw in CHARTS.items():
+        # Márgenes fijos de la plantilla: una sola pasada de dibujo, como en el dashboard.
+        (target / f"{chart}.png").write_bytes(rasterize(draw(df), dpi=dpi))
+        body.append(f'<img src="{chart}.png" alt="{chart}">')
+    for table, build in TABLES.items():
+        frame = build(df)
+        frame.to_csv(target / f"{table}.csv")
+        body.append(f"<h2>{table}</h2>" + frame.to_html(float_format="%.2f"))
+    (target / "index.html").write_text(
+        "<!doctype html><meta charset='utf-8'>\n" + "\n".join(body), encoding="utf-8"
+    )
+    return name, len(df), float(df["G3"].mean())
+
+
+def generate(df, by, out_dir, jobs=None, dpi=DEFAULT_DPI):
+    """Genera los reportes de todos los segmentos en paralelo; devuelve el índice."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [(name, frame, out_dir, dpi) for name, frame in segments(df, by)]
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(render_segment, tasks, chunksize=chunksize))
+    index = pd.DataFrame(results, columns=["segmento", "estudiantes", "G3"])
+    index.to_csv(out_dir / "segmentos.csv", index=False)
+    links = "\n".join(
+        f'<li><a href="{html.escape(name)}/index.html">{html.escape(name)}</a> '
+        f"({n} estudiantes, G3 promedio {g3:.2f})</li>"
+        for name, n, g3 in results
+    )
+    (out_dir / "index.html").write_text(
+        f"<!doctype html><meta charset='utf-8'>\n<h1>Reportes</h1>\n<ul>\n{links}\n</ul>",
+        encoding="utf-8",
+    )
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes por segmento del dataset de estudiantes.")
+    parser.add_argument("source", nargs="?", help="archivo, directorio, patrón glob o URL")
+    parser.add_argument(
+        "--by", action="append", default=[],
+        help=f"columna de segmentación (repetible); '{FILE_SEGMENT}' segmenta por archivo de origen",
+    )
+    parser.add_argument("-o", "--out", default="reportes", help="directorio de salida")
+    parser.add_argument("-j", "--jobs", type=int, help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    args = parser.parse_args(argv)
+
+    df = load_frames(args.source, args.by)
+    index = generate(df, args.by, args.out, args.jobs, args.dpi)
+    print(f"{len(index)} segmento(s) en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Puntaje de riesgo académico a partir de G1, G2, ausencias, materias reprobadas y estudio.
+
+Dos modelos sobre las mismas variables:
+
+* la nota final esperada (``G3``) por mínimos cuadrados, resuelta con los
+  estadísticos suficientes de :class:`correlation.MomentStats` (sin recorrer filas);
+* la probabilidad de reprobar (``G3 < 10``) por regresión logística. Las variables
+  son enteros pequeños, así que las filas se agrupan por combinación de valores y el
+  ajuste (IRLS con una penalización L2 pequeña, porque ``G2`` casi separa las clases)
+  trabaja sobre esas combinaciones con su conteo y no sobre millones de filas.
+
+El modelo se ajusta una vez por versión de datos. :meth:`RiskModel.score` evalúa toda
+una población con un par de productos matriciales de NumPy.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from correlation import MomentStats
+from regression import MultipleFit, fit_multiple
+
+FEATURES = ["G1", "G2", "absences", "failures", "studytime"]
+TARGET = "G3"
+PASSING_GRADE = 10
+# Penalización L2 de los coeficientes estandarizados (no del intercepto).
+RIDGE = 1.0
+# Cortes de probabilidad de reprobar para el resumen por nivel de riesgo.
+RISK_BANDS = [0.0, 0.25, 0.5, 0.75, 1.0]
+RISK_LABELS = ["bajo", "moderado", "alto", "muy alto"]
+# Estudiantes que se guardan en el ranking de riesgo (el dashboard muestra una parte).
+RANK_TOP = 200
+
+
+def _sigmoid(z):
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def fit_logistic(X, y, weights, ridge=RIDGE, max_iter=50, tol=1e-8):
+    """Regresión logística por IRLS sobre filas con peso (``y`` es la fracción de positivos).
+
+    ``X`` no incluye la columna del intercepto. Devuelve ``(intercepto, coeficientes)``.
+    """
+    X1 = np.column_stack([np.ones(len(X)), X])
+    beta = np.zeros(X1.shape[1])
+    penalty = np.full(X1.shape[1], ridge)
+    penalty[0] = 0.0
+    for _ in range(max_iter):
+        p = _sigmoid(X1 @ beta)
+        w = weights * p * (1 - p)
+        gradient = X1.T @ (weights * (y - p)) - penalty * beta
+        hessian = (X1.T * w) @ X1 + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta += step
+        if np.abs(step).max() < tol:
+            break
+    return float(beta[0]), beta[1:]
+
+
+@dataclass(frozen=True)
+class RiskModel:
+    """Modelos ajustados de nota esperada y probabilidad de reprobar."""
+
+    features: tuple
+    grade: MultipleFit
+    logit_intercept: float
+    logit_coefficients: np.ndarray
+    center: np.ndarray
+    scale: np.ndarray
+    n: int
+    version: str = None
+
+    @classmethod
+    def fit(cls, df, stats=None):
+        """Ajusta ambos modelos con ``df``; ``stats`` (momentos de ``df``) evita recorrerlo
+        para la regresión lineal."""
+        features = list(FEATURES)
+        if stats is None or not set(features + [TARGET]) <= set(stats.columns):
+            stats = MomentStats.from_frame(df, features + [TARGET])
+        grade = fit_multiple(stats, features, TARGET)
+
+        # Combinaciones únicas de las variables con su conteo y sus reprobados.
+        failed = (df[TARGET] < PASSING_GRADE).rename("failed")
+        grouped = (
+            pd.concat([df[features], failed], axis=1)
+            .groupby(features, observed=True, sort=False)["failed"]
+            .agg(["size", "sum"])
+            .reset_index()
+        )
+        X = grouped[features].to_numpy(dtype=np.float64)
+        counts = grouped["size"].to_numpy(dtype=np.float64)
+        center = np.average(X, axis=0, weights=counts)
+        scale = np.sqrt(np.average((X - center) ** 2, axis=0, weights=counts))
+        scale[scale == 0] = 1.0
+        intercept, coefficients = fit_logistic(
+            (X - center) / scale, grouped["sum"].to_numpy(dtype=np.float64) / counts, counts
+        )
+        return cls(
+            tuple(features), grade, intercept, coefficients, center, scale, len(df),
+            df.attrs.get("version"),
+        )
+
+    def score(self, df):
+        """Nota esperada y probabilidad de reprobar de cada fila de ``df``."""
+        X = df[list(self.features)].to_numpy(dtype=np.float32)
+        linear = np.fromiter(self.grade.coefficients.values(), dtype=np.float32, count=len(self.features))
+        predicted = X @ linear + np.float32(self.grade.intercept)
+        # Coeficientes llevados a la escala original para no estandarizar X.
+        weights = (self.logit_coefficients / self.scale).astype(np.float32)
+        bias = np.float32(self.logit_intercept - weights.astype(np.float64) @ self.center)
+        probability = _sigmoid(X @ weights + bias)
+        return pd.DataFrame(
+            {"G3_esperada": np.clip(predicted, 0, 20), "prob_reprobar": probability}, index=df.index
+        )
+
+    def odds_ratios(self):
+        """Cambio multiplicativo de las chances de reprobar por unidad de cada variable."""
+        return pd.Series(np.exp(self.logit_coefficients / self.scale), index=list(self.features))
+
+
+def rank(df, scores, top=RANK_TOP):
+    """Las ``top`` filas con mayor probabilidad de reprobar, con sus puntajes."""
+    probability = scores["prob_reprobar"].to_numpy()
+    top = min(top, len(probability))
+    if not top:
+        return df.iloc[:0].join(scores)
+    candidates = np.argpartition(-probability, top - 1)[:top]
+    order = candidates[np.argsort(-probability[candidates], kind="stable")]
+    return df.iloc[order].join(scores.iloc[order])
+
+
+def band_counts(scores):
+    """Estudiantes por nivel de riesgo."""
+    bands = pd.cut(scores["prob_reprobar"], RISK_BANDS, labels=RISK_LABELS, include_lowest=True)
+    return bands.value_counts(sort=False)
@@ -0,0 +1,140 @@
+"""Esquema declarado de las 33 columnas de student-por.csv.
+
+Cada columna tiene un tipo compacto: ``yes``/``no`` se lee como bool, los textos
+de pocos valores como ``category`` con categorías fijas, y los enteros pequeños
+(edad, escalas Likert 1-5, notas 0-20) como int8. Los rangos se validan al cargar.
+"""
+
+import pandas as pd
+
+YES_NO = [
+    "schoolsup", "famsup", "paid", "activities",
+    "nursery", "higher", "internet", "romantic",
+]
+
+# Etiquetas para mostrar las columnas yes/no (guardadas como bool).
+YES_NO_LABELS = {False: "no", True: "yes"}
+
+_JOBS = ["at_home", "health", "other", "services", "teacher"]
+
+CATEGORIES = {
+    "school": ["GP", "MS"],
+    "sex": ["F", "M"],
+    "address": ["R", "U"],
+    "famsize": ["GT3", "LE3"],
+    "Pstatus": ["A", "T"],
+    "Mjob": _JOBS,
+    "Fjob": _JOBS,
+    "reason": ["course", "home", "other", "reputation"],
+    "guardian": ["father", "mother", "other"],
+}
+
+# Columnas enteras con su rango válido (inclusive).
+INTEGER_RANGES = {
+    "age": (15, 22),
+    "Medu": (0, 4),
+    "Fedu": (0, 4),
+    "traveltime": (1, 4),
+    "studytime": (1, 4),
+    "failures": (0, 4),
+    "famrel": (1, 5),
+    "freetime": (1, 5),
+    "goout": (1, 5),
+    "Dalc": (1, 5),
+    "Walc": (1, 5),
+    "health": (1, 5),
+    "absences": (0, 93),
+    "G1": (0, 20),
+    "G2": (0, 20),
+    "G3": (0, 20),
+}
+
+# Orden original de las columnas en el CSV.
+COLUMNS = [
+    "school", "sex", "age", "address", "famsize", "Pstatus", "Medu", "Fedu",
+    "Mjob", "Fjob", "reason", "guardian", "traveltime", "studytime", "failures",
+    "schoolsup", "famsup", "paid", "activities", "nursery", "higher", "internet",
+    "romantic", "famrel", "freetime", "goout", "Dalc", "Walc", "health",
+    "absences", "G1", "G2", "G3",
+]
+
+GRADES = ["G1", "G2", "G3"]
+# Columnas numéricas que el CSV fuente escribe entre comillas ("0";"11";11).
+QUOTED_NUMERIC = ["G1", "G2"]
+NUMERIC = list(INTEGER_RANGES)
+
+
+class SchemaError(ValueError):
+    """Los datos no cumplen el esquema declarado."""
+
+
+def dtypes():
+    """Tipos destino de cada columna, en el orden del CSV."""
+    result = {}
+    for column in COLUMNS:
+        if column in YES_NO:
+            result[column] = "bool"
+        elif column in CATEGORIES:
+            result[column] = pd.CategoricalDtype(CATEGORIES[column])
+        else:
+            result[column] = "int8"
+    return result
+
+
+def read_csv_kwargs():
+    """Argumentos de ``pd.read_csv`` que aplican el esquema durante el parseo."""
+    # Los enteros se leen como int16 y los textos como categorías inferidas para
+    # poder detectar valores fuera de rango o de dominio antes de estrecharlos.
+    parse_dtypes = {column: "int16" for column in INTEGER_RANGES}
+    parse_dtypes.update({column: "category" for column in CATEGORIES})
+    return {
+        "usecols": COLUMNS,
+        "dtype": parse_dtypes,
+        "true_values": ["yes"],
+        "false_values": ["no"],
+    }
+
+
+def coerce(df):
+    """Valida rangos y dominios y devuelve ``df`` con los tipos del esquema."""
+    missing = [column for column in COLUMNS if column not in df.columns]
+    if missing:
+        raise SchemaError(f"Faltan columnas: {', '.join(missing)}")
+
+    df = df[COLUMNS].copy()
+    for column, (low, high) in INTEGER_RANGES.items():
+        values = pd.to_numeric(df[column], errors="raise")
+        out_of_range = ~values.between(low, high)
+        if out_of_range.any():
+            bad = values[out_of_range].iloc[0]
+            raise SchemaError(f"{column}: valor {bad} fuera del rango [{low}, {high}]")
+        df[column] = values.astype("int8")
+
+    for column in YES_NO:
+        if df[column].dtype != bool:
+            values = df[column].map({"yes": True, "no": False, True: True, False: False})
+            if values.isna().any():
+                raise SchemaError(f"{column}: solo se admiten los valores yes/no")
+            df[column] = values.astype(bool)
+
+    for column, categories in CATEGORIES.items():
+        values = df[column].astype(pd.CategoricalDtype(categories))
+        if values.isna().any():
+            bad = df[column][values.isna()].iloc[0]
+            raise SchemaError(f"{column}: valor {bad!r} fuera del dominio {categories}")
+        df[column] = values
+
+    return df
+
+
+def to_source(df):
+    """Copia de ``df`` con las columnas yes/no y ``QUOTED_NUMERIC`` como texto, para que
+    al escribirla se vea igual que el CSV fuente."""
+    df = df.copy()
+    for column in YES_NO:
+        if column in df.columns and df[column].dtype == bool:
+            df[column] = df[column].map(YES_NO_LABELS)
+    for column in QUOTED_NUMERIC:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column]):
+            df[column] = df[column].astype(str)
+    return df
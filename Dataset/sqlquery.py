@@ -0,0 +1,337 @@
+"""Consultas agregadas contra el almacén SQLite.
+
+Traduce un :class:`filters.FilterState` y una agregación (conteo, media, varianza
+de una nota agrupada por columnas) a una sola sentencia ``SELECT ... WHERE ...
+GROUP BY``, de modo que la base devuelve solo las filas agregadas. Cuando el filtro
+y la agrupación caben en las llaves de una tabla resumen de :mod:`store`, la
+consulta se resuelve sobre esa tabla en vez de recorrer ``student_por``.
+
+Con ``STUDENT_BACKEND=sqlite`` el dashboard no carga el dataset en memoria:
+:class:`StoreIndex` da los valores de los filtros y los conteos, :func:`moments` y
+:func:`spearman` los estadísticos de la correlación y las regresiones, y
+:func:`describe`, :func:`grade_summary` y :func:`histogram` las tablas y los
+diagramas de caja, todo con agregados. Solo los gráficos de dispersión y el riesgo
+leen filas, y solo las de la selección (:func:`students`, :func:`iter_students`).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregations import SUMMARY_METRICS
+from correlation import MomentStats
+from filters import FILTER_COLUMNS, normalize_state
+from loader import DEFAULT_CHUNK_ROWS
+from quantiles import GroupedHistogram, percentile
+from schema import CATEGORIES, COLUMNS, GRADES, INTEGER_RANGES, NUMERIC, YES_NO, dtypes
+from store import SUMMARIES, TABLE
+
+
+@dataclass(frozen=True)
+class AggregateQuery:
+    """Sentencia parametrizada y las columnas de agrupación que devuelve."""
+
+    sql: str
+    params: tuple
+    by: tuple
+
+
+def _sql_value(column, value):
+    if column in YES_NO:
+        return int(bool(value))
+    if column in CATEGORIES:
+        return str(value)
+    return int(value)
+
+
+def where_clause(state):
+    """``WHERE`` parametrizado equivalente a ``state`` (cadena vacía si no filtra)."""
+    clauses = []
+    params = []
+    for column, values in state.selections:
+        if not values:
+            clauses.append("0")
+            continue
+        placeholders = ", ".join("?" for _ in values)
+        clauses.append(f'"{column}" IN ({placeholders})')
+        params += [_sql_value(column, value) for value in values]
+    sql = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return sql, tuple(params)
+
+
+def _summary_for(state, by, measure):
+    """Tabla resumen más pequeña que cubre el filtro y la agrupación, si existe."""
+    if measure != "G3":
+        return None
+    needed = set(state.columns()) | set(by)
+    candidates = [name for name, keys in SUMMARIES.items() if needed <= set(keys)]
+    return min(candidates, key=lambda name: len(SUMMARIES[name]), default=None)
+
+
+def aggregate_query(state, by, measure="G3"):
+    """Consulta de conteo, suma y suma de cuadrados de ``measure`` agrupados por ``by``."""
+    by = (by,) if isinstance(by, str) else tuple(by)
+    columns = ", ".join(f'"{column}"' for column in by)
+    where, params = where_clause(state)
+    summary = _summary_for(state, by, measure)
+    if summary is not None:
+        source = summary
+        totals = "SUM(n), SUM(g3_sum), SUM(g3_sumsq)"
+    else:
+        source = TABLE
+        totals = f'COUNT(*), SUM("{measure}"), SUM("{measure}" * "{measure}")'
+    sql = (
+        f"SELECT {columns}, {totals} FROM {source}{where} "
+        f"GROUP BY {columns} ORDER BY {columns}"
+    )
+    return AggregateQuery(sql, params, by)
+
+
+def aggregate(conn, state, by, measure="G3"):
+    """Mismo resultado que :meth:`cube.DataCube.aggregate`, calculado por SQLite."""
+    query = aggregate_query(state, by, measure)
+    rows = conn.execute(query.sql, query.params).fetchall()
+    frame = pd.DataFrame(rows, columns=[*query.by, "n", "sum", "sumsq"])
+    types = dtypes()
+    for column in query.by:
+        frame[column] = frame[column].astype(types[column])
+    n = frame["n"].to_numpy(dtype=np.int64)
+    total = frame["sum"].to_numpy(dtype=np.int64)
+    total_sq = frame["sumsq"].to_numpy(dtype=np.int64)
+    spread = (n * total_sq - total * total).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.where(n > 1, spread / (n * (n - 1.0)), np.nan)
+    index = (
+        pd.Index(frame[query.by[0]]) if len(query.by) == 1
+        else pd.MultiIndex.from_frame(frame[list(query.by)])
+    )
+    return pd.DataFrame(
+        {"count": n, "mean": total / n, "var": var, "std": np.sqrt(var)},
+        index=index,
+    )
+
+
+def mean(conn, state, by, measure="G3"):
+    """Serie equivalente a ``groupby(by, observed=True)[measure].mean()``."""
+    return aggregate(conn, state, by, measure)["mean"].rename(measure)
+
+
+def count(conn, state):
+    """Filas que cumplen ``state``."""
+    where, params = where_clause(state)
+    return conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
+
+
+def _moments_sql(columns, source):
+    pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+    terms = [f'SUM("{column}")' for column in columns]
+    terms += [f'SUM("{columns[i]}" * "{columns[j]}")' for i, j in pairs]
+    return f"SELECT COUNT(*), {', '.join(terms)} FROM {source}", pairs
+
+
+def _moment_stats(columns, row, pairs):
+    values = np.array([value or 0 for value in row[1:]], dtype=np.float64)
+    cross = np.zeros((len(columns), len(columns)))
+    for (i, j), value in zip(pairs, values[len(columns):]):
+        cross[i, j] = cross[j, i] = value
+    return MomentStats(columns, row[0], values[:len(columns)], cross)
+
+
+def moments(conn, state, columns=NUMERIC):
+    """:class:`correlation.MomentStats` de las filas que cumplen ``state``, calculados en
+    una sola consulta (conteo, sumas y productos cruzados)."""
+    columns = list(columns)
+    where, params = where_clause(state)
+    sql, pairs = _moments_sql(columns, f"{TABLE}{where}")
+    return _moment_stats(columns, conn.execute(sql, params).fetchone(), pairs)
+
+
+def value_counts(conn, state, columns=NUMERIC):
+    """Conteo por valor de cada columna entera en las filas que cumplen ``state``:
+    ``{columna: (valores, conteos)}`` con los valores en orden ascendente."""
+    columns = list(columns)
+    where, params = where_clause(state)
+    sql = " UNION ALL ".join(
+        f'SELECT {i}, "{column}", COUNT(*) FROM {TABLE}{where} GROUP BY "{column}"'
+        for i, column in enumerate(columns)
+    )
+    found = {column: ([], []) for column in columns}
+    for i, value, n in conn.execute(sql, params * len(columns)):
+        found[columns[i]][0].append(value)
+        found[columns[i]][1].append(n)
+    return {
+        column: (np.array(values, dtype=np.int64), np.array(counts, dtype=np.int64))
+        for column, (values, counts) in found.items()
+    }
+
+
+def describe(conn, state, columns=NUMERIC):
+    """Igual que ``DataFrame.describe()`` de las filas que cumplen ``state``; los
+    cuartiles salen del conteo por valor (las columnas son enteras)."""
+    stats = {}
+    for column, (values, counts) in value_counts(conn, state, columns).items():
+        n = counts.sum()
+        if not n:
+            stats[column] = [0.0] + [np.nan] * 7
+            continue
+        mean = (values * counts).sum() / n
+        std = np.sqrt((counts * (values - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+        quartiles = [percentile(values, counts, q) for q in (25, 50, 75)]
+        stats[column] = [n, mean, std, values[0], *quartiles, values[-1]]
+    index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    return pd.DataFrame(stats, index=index, dtype=np.float64)
+
+
+def spearman(conn, state, columns=NUMERIC):
+    """Igual que :func:`correlation.spearman_matrix` de las filas que cumplen ``state``.
+
+    El rango promedio de cada valor sale del conteo por valor; con él, los momentos
+    de los rangos se suman en una sola consulta, sin leer las filas.
+    """
+    columns = list(columns)
+    ranks = {}
+    for column, (values, counts) in value_counts(conn, state, columns).items():
+        if not len(values):
+            return MomentStats(columns).pearson()
+        before = np.cumsum(counts) - counts
+        ranks[column] = dict(zip(values.tolist(), (before + (counts + 1) / 2).tolist()))
+    ranked = ", ".join(
+        f'CASE "{column}" '
+        + " ".join(f"WHEN {value} THEN {rank!r}" for value, rank in ranks[column].items())
+        + f' END AS "{column}"'
+        for column in columns
+    )
+    where, params = where_clause(state)
+    sql, pairs = _moments_sql(columns, f"(SELECT {ranked} FROM {TABLE}{where})")
+    return _moment_stats(columns, conn.execute(sql, params).fetchone(), pairs).pearson()
+
+
+def grade_summary(conn, state, by, grades=GRADES, metrics=SUMMARY_METRICS):
+    """Igual que :func:`aggregations.grade_summary` de las filas que cumplen ``state``,
+    en un solo ``GROUP BY``."""
+    by = [by] if isinstance(by, str) else list(by)
+    keys = ", ".join(f'"{column}"' for column in by)
+    terms = [
+        f'SUM("{grade}"), SUM("{grade}" * "{grade}"), MIN("{grade}"), MAX("{grade}")'
+        for grade in grades
+    ]
+    where, params = where_clause(state)
+    rows = conn.execute(
+        f"SELECT {keys}, COUNT(*), {', '.join(terms)} FROM {TABLE}{where} "
+        f"GROUP BY {keys} ORDER BY {keys}",
+        params,
+    ).fetchall()
+    names = [*by, "n"] + [f"{grade}_{part}" for grade in grades for part in ("sum", "sumsq", "min", "max")]
+    frame = pd.DataFrame(rows, columns=names)
+    types = dtypes()
+    n = frame["n"].to_numpy(dtype=np.int64)
+    columns = {}
+    for grade in grades:
+        total = frame[f"{grade}_sum"].to_numpy(dtype=np.float64)
+        spread = n * frame[f"{grade}_sumsq"].to_numpy(dtype=np.float64) - total * total
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.where(n > 1, spread / (n * (n - 1.0)), np.nan)
+        values = {
+            "mean": total / n,
+            "count": n,
+            "std": np.sqrt(np.maximum(var, 0)),
+            "min": frame[f"{grade}_min"].astype(types[grade]).to_numpy(),
+            "max": frame[f"{grade}_max"].astype(types[grade]).to_numpy(),
+        }
+        for metric in metrics:
+            columns[(grade, metric)] = values[metric]
+    keys_frame = frame[by].astype({column: types[column] for column in by})
+    index = pd.Index(keys_frame[by[0]]) if len(by) == 1 else pd.MultiIndex.from_frame(keys_frame)
+    return pd.DataFrame(columns, index=index)
+
+
+def histogram(conn, state, column, dimensions):
+    """:class:`quantiles.GroupedHistogram` de ``column`` por celda de ``dimensions``
+    para las filas que cumplen ``state``, en un solo ``GROUP BY``."""
+    dimensions = [d for d in dimensions if d != column]
+    keys = ", ".join(f'"{d}"' for d in dimensions)
+    where, params = where_clause(state)
+    rows = conn.execute(
+        f'SELECT {keys}, "{column}", COUNT(*) FROM {TABLE}{where} '
+        f'GROUP BY {keys}, "{column}" ORDER BY {keys}',
+        params,
+    ).fetchall()
+    frame = pd.DataFrame(rows, columns=[*dimensions, column, "n"])
+    types = dtypes()
+    frame = frame.astype({d: types[d] for d in dimensions})
+    grouped = frame.groupby(dimensions, observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    low, high = INTEGER_RANGES[column]
+    counts = np.zeros((grouped.ngroups, high - low + 1), dtype=np.int64)
+    np.add.at(counts, (codes, frame[column].to_numpy(dtype=np.int64) - low), frame["n"].to_numpy())
+    cells = grouped.size().reset_index()[dimensions]
+    return GroupedHistogram(cells, counts, column, dimensions, low)
+
+
+def _typed(frame):
+    """Filas leídas del almacén con los tipos del esquema, indexadas por posición."""
+    types = dtypes()
+    frame = frame.set_index("row").rename_axis(None)
+    return frame.astype({column: types[column] for column in frame.columns})
+
+
+def _students_query(state, columns):
+    names = ", ".join(f'"{column}"' for column in columns)
+    where, params = where_clause(state)
+    # rowid - 1 es la posición de la fila en el dataset, igual que el índice en memoria.
+    return f"SELECT rowid - 1 AS row, {names} FROM {TABLE}{where} ORDER BY rowid", params
+
+
+def students(conn, state, columns=COLUMNS):
+    """Filas que cumplen ``state`` con los tipos del esquema."""
+    sql, params = _students_query(state, columns)
+    return _typed(pd.read_sql_query(sql, conn, params=params))
+
+
+def iter_students(conn, state, chunk_rows=DEFAULT_CHUNK_ROWS, columns=COLUMNS):
+    """Como :func:`students`, por bloques de ``chunk_rows`` filas (al menos uno, aunque
+    sea vacío, para que una exportación lleve las columnas)."""
+    sql, params = _students_query(state, columns)
+    empty = True
+    for frame in pd.read_sql_query(sql, conn, params=params, chunksize=chunk_rows):
+        empty = False
+        yield _typed(frame)
+    if empty:
+        yield _typed(pd.DataFrame({column: [] for column in ["row", *columns]}))
+
+
+def distinct_values(conn, column):
+    """Valores de ``column`` en el almacén, en el mismo orden que :class:`filters.FilterIndex`."""
+    if column in CATEGORIES:
+        return list(CATEGORIES[column])
+    rows = conn.execute(f'SELECT DISTINCT "{column}" FROM {TABLE} ORDER BY "{column}"').fetchall()
+    return [bool(value) if column in YES_NO else value for (value,) in rows]
+
+
+class StoreIndex:
+    """Valores de filtro, normalización y conteos resueltos en el almacén.
+
+    Cumple el papel de :class:`filters.FilterIndex` en la barra lateral cuando el
+    dashboard trabaja sobre SQLite, sin bitmaps ni datos en memoria.
+    """
+
+    def __init__(self, pool, columns=FILTER_COLUMNS):
+        self.pool = pool
+        with pool.connection() as conn:
+            self.n_rows = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+            self._values = {column: distinct_values(conn, column) for column in columns}
+
+    @property
+    def columns(self):
+        return list(self._values)
+
+    def values(self, column):
+        return list(self._values[column])
+
+    def normalize(self, mapping):
+        return normalize_state(self._values, mapping)
+
+    def count(self, state):
+        with self.pool.connection() as conn:
+            return count(conn, state)
@@ -0,0 +1,270 @@
+"""Almacén analítico en SQLite para el dataset de estudiantes.
+
+Crea la tabla ``student_por`` con tipos y restricciones derivados de
+:mod:`schema`, índices sobre las columnas de filtro y agrupación, las cuatro
+proyecciones del análisis original (``barras_col``, ``barrasG3``, ``rendimiento``
+y ``apoyo``) como vistas, y tablas resumen materializadas que se mantienen al día
+con triggers: cada INSERT o DELETE en ``student_por`` actualiza solo las celdas
+afectadas, sin recrear nada. Las cargas completas (:func:`load_frame`, la ingesta)
+quitan triggers e índices mientras insertan y recalculan las tablas resumen al final
+con un ``GROUP BY`` por tabla, mucho más barato que un upsert por fila.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from db import get_pool
+from loader import DEFAULT_CACHE_DIR
+from schema import CATEGORIES, COLUMNS, INTEGER_RANGES, YES_NO, coerce
+
+DEFAULT_DB_PATH = DEFAULT_CACHE_DIR / "student-por.db"
+TABLE = "student_por"
+
+INDEXED_COLUMNS = ["school", "sex", "age", "schoolsup", "internet"]
+
+# Proyecciones del análisis original (antes tablas copiadas con CREATE TABLE AS).
+VIEWS = {
+    "barras_col": ["sex", "G3", "school"],
+    "barrasG3": ["G3", "age", "sex"],
+    "rendimiento": ["G1", "G2", "G3", "absences", "studytime", "sex"],
+    "apoyo": ["G3", "schoolsup", "famsup", "internet", "studytime"],
+}
+
+# Tablas resumen: conteo, suma y suma de cuadrados de G3 por combinación de llaves.
+# ``summary_apoyo`` incluye G3 en la llave, así que además es un histograma exacto.
+SUMMARIES = {
+    "summary_school_sex": ["school", "sex"],
+    "summary_age_sex": ["age", "sex"],
+    "summary_apoyo": ["schoolsup", "famsup", "internet", "studytime", "G3"],
+}
+
+
+def _key_sql(column):
+    sql_type = "TEXT" if column in CATEGORIES else "INTEGER"
+    return f'"{column}" {sql_type} NOT NULL'
+
+
+def _column_sql(column):
+    if column in CATEGORIES:
+        domain = ", ".join(f"'{value}'" for value in CATEGORIES[column])
+        return f'{_key_sql(column)} CHECK ("{column}" IN ({domain}))'
+    if column in YES_NO:
+        return f'{_key_sql(column)} CHECK ("{column}" IN (0, 1))'
+    low, high = INTEGER_RANGES[column]
+    return f'{_key_sql(column)} CHECK ("{column}" BETWEEN {low} AND {high})'
+
+
+def _summary_sql(name, keys):
+    columns = ", ".join(f'"{key}"' for key in keys)
+    new_values = ", ".join(f'NEW."{key}"' for key in keys)
+    match_old = " AND ".join(f'"{key}" = OLD."{key}"' for key in keys)
+    key_defs = ", ".join(_key_sql(key) for key in keys)
+    return [
+        f"""CREATE TABLE IF NOT EXISTS {name} (
+            {key_defs},
+            n INTEGER NOT NULL,
+            g3_sum INTEGER NOT NULL,
+            g3_sumsq INTEGER NOT NULL,
+            PRIMARY KEY ({columns})
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {TABLE}
+        BEGIN
+            INSERT INTO {name} ({columns}, n, g3_sum, g3_sumsq)
+            VALUES ({new_values}, 1, NEW.G3, NEW.G3 * NEW.G3)
+            ON CONFLICT ({columns}) DO UPDATE SET
+                n = n + 1,
+                g3_sum = g3_sum + excluded.g3_sum,
+                g3_sumsq = g3_sumsq + excluded.g3_sumsq;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {TABLE}
+        BEGIN
+            UPDATE {name} SET
+                n = n - 1,
+                g3_sum = g3_sum - OLD.G3,
+                g3_sumsq = g3_sumsq - OLD.G3 * OLD.G3
+            WHERE {match_old};
+            DELETE FROM {name} WHERE {match_old} AND n = 0;
+        END""",
+    ]
+
+
+def schema_statements():
+    """Sentencias DDL del almacén, idempotentes."""
+    columns = ",\n    ".join(_column_sql(column) for column in COLUMNS)
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {TABLE} (\n    {columns}\n)",
+        "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    ]
+    statements += [
+        f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_{column} ON {TABLE} ("{column}")'
+        for column in INDEXED_COLUMNS
+    ]
+    statements.append(
+        f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_school_sex_age ON {TABLE} (school, sex, age)"
+    )
+    for view, view_columns in VIEWS.items():
+        # Las vistas muestran yes/no como texto, igual que el CSV original.
+        selected = ", ".join(
+            f'CASE "{column}" WHEN 1 THEN \'yes\' ELSE \'no\' END AS "{column}"'
+            if column in YES_NO else f'"{column}"'
+            for column in view_columns
+        )
+        statements.append(f"CREATE VIEW IF NOT EXISTS {view} AS SELECT {selected} FROM {TABLE}")
+    for name, keys in SUMMARIES.items():
+        statements += _summary_sql(name, keys)
+    return statements
+
+
+def connect(path=DEFAULT_DB_PATH):
+    """Conexión suelta, para usos puntuales; el dashboard y los scripts usan :func:`open_store`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(str(path))
+
+
+def open_store(path=DEFAULT_DB_PATH):
+    """Pool compartido de conexiones al almacén, con el esquema ya creado."""
+    pool = get_pool(path)
+    with pool.writer() as conn:
+        create_schema(conn)
+    return pool
+
+
+def create_schema(conn):
+    with conn:
+        for statement in schema_statements():
+            conn.execute(statement)
+
+
+def _rows(df):
+    """Filas listas para SQLite: bool como 0/1 y categorías como texto."""
+    df = coerce(df)
+    columns = [
+        (
+            df[column].astype("int64") if column in YES_NO or column in INTEGER_RANGES
+            else df[column].astype(str)
+        ).tolist()
+        for column in COLUMNS
+    ]
+    return zip(*columns)
+
+
+def insert_frame(conn, df):
+    """Inserta las filas de ``df``; los triggers actualizan las tablas resumen.
+
+    ``_rows`` ya valida rangos y dominios con :func:`schema.coerce`, así que los CHECK
+    de la tabla (la mayor parte del costo de insertar) se omiten en estas inserciones.
+    """
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    names = ", ".join(f'"{column}"' for column in COLUMNS)
+    rows = _rows(df)
+    conn.execute("PRAGMA ignore_check_constraints = ON")
+    try:
+        with conn:
+            conn.executemany(f"INSERT INTO {TABLE} ({names}) VALUES ({placeholders})", rows)
+    finally:
+        conn.execute("PRAGMA ignore_check_constraints = OFF")
+
+
+def begin_load(conn):
+    """Prepara una carga completa: quita los triggers de las tablas resumen y los
+    índices, vacía el almacén y borra su versión (si la carga no termina, la próxima
+    sincronización la repite)."""
+    create_schema(conn)
+    with conn:
+        indexes = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name LIKE 'idx_%'",
+            (TABLE,),
+        ).fetchall()
+        for (index,) in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        for name in SUMMARIES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}_insert")
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}_delete")
+        conn.execute("DELETE FROM store_meta WHERE key = 'version'")
+        conn.execute(f"DELETE FROM {TABLE}")
+
+
+def finish_load(conn):
+    """Recalcula las tablas resumen y vuelve a crear índices y triggers."""
+    rebuild_summaries(conn)
+    create_schema(conn)
+
+
+@contextmanager
+def bulk_load(conn):
+    """Bloque de carga completa entre :func:`begin_load` y :func:`finish_load`."""
+    begin_load(conn)
+    try:
+        yield conn
+    finally:
+        finish_load(conn)
+
+
+def clear(conn):
+    """Vacía la tabla de estudiantes y las tablas resumen."""
+    with bulk_load(conn):
+        pass
+
+
+def load_frame(conn, df):
+    """Reemplaza el contenido del almacén por ``df``."""
+    with bulk_load(conn):
+        insert_frame(conn, df)
+
+
+def stored_version(conn):
+    row = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+    return row[0] if row else None
+
+
+def set_version(conn, version):
+    with conn:
+        conn.execute(
+            "INSERT INTO store_meta (key, value) VALUES ('version', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (version,),
+        )
+
+
+def sync_frame(conn, df):
+    """Carga ``df`` en el almacén solo si su versión (``df.attrs["version"]``) cambió.
+
+    Si el almacén está en una versión anterior de ``df.attrs["history"]``, solo se
+    insertan las filas agregadas desde esa versión.
+    """
+    create_schema(conn)
+    version = df.attrs.get("version")
+    current = stored_version(conn)
+    if version is not None and current == version:
+        return
+    previous_rows = dict(df.attrs.get("history", [])).get(current)
+    if previous_rows is not None:
+        insert_frame(conn, df.iloc[previous_rows:])
+    else:
+        load_frame(conn, df)
+    if version is not None:
+        set_version(conn, version)
+
+
+def rebuild_summaries(conn):
+    """Recalcula por completo las tablas resumen (al final de una carga completa o para
+    reparar inconsistencias)."""
+    with conn:
+        for name, keys in SUMMARIES.items():
+            columns = ", ".join(f'"{key}"' for key in keys)
+            conn.execute(f"DELETE FROM {name}")
+            conn.execute(
+                f"""INSERT INTO {name} ({columns}, n, g3_sum, g3_sumsq)
+                SELECT {columns}, COUNT(*), SUM(G3), SUM(G3 * G3) FROM {TABLE} GROUP BY {columns}"""
+            )
+
+
+def read_students(conn, where="", params=()):
+    """Lee filas de ``student_por`` con los tipos del esquema."""
+    sql = f"SELECT * FROM {TABLE}" + (f" WHERE {where}" if where else "")
+    return coerce(pd.read_sql_query(sql, conn, params=params))
+
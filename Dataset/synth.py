@@ -0,0 +1,96 @@
+"""Genera versiones sintéticas más grandes de student-por.csv para pruebas de escala.
+
+Cada fila sintética parte de una fila real elegida al azar (bootstrap), así que las
+columnas categóricas y yes/no conservan su distribución conjunta tal cual. Las
+columnas con variación continua se perturban sin romper sus relaciones: las tres
+notas se desplazan juntas (la correlación entre G1, G2 y G3 se mantiene y un G3 de 0,
+abandono, sigue en 0) y las ausencias reciben un ruido pequeño. Todo se recorta a los
+rangos de :mod:`schema`, y la salida usa el mismo formato que el CSV original, así
+que la leen ``loader`` e ``ingest`` sin cambios.
+
+Uso::
+
+    python synth.py 1M -o datos/student-synth-1m.csv --seed 0
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+
+from loader import CSV_DELIMITER, DEFAULT_CHUNK_ROWS, DEFAULT_SOURCE, read_source
+from schema import COLUMNS, GRADES, INTEGER_RANGES, to_source
+
+SCALES = {"100K": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+GRADE_JITTER = 0.3
+ABSENCE_JITTER = 2
+
+
+def parse_rows(text):
+    """``"100K"``, ``"1M"``, ``"2.5M"`` o ``"5000"`` a número de filas."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*", str(text))
+    if not match:
+        raise ValueError(f"Tamaño inválido: {text!r}")
+    number, suffix = match.groups()
+    return int(float(number) * {"": 1, "k": 1_000, "m": 1_000_000}[suffix.lower()])
+
+
+def _clip(values, column):
+    low, high = INTEGER_RANGES[column]
+    return np.clip(values, low, high).astype("int8")
+
+
+def synthesize(seed_df, rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS,
+               grade_jitter=GRADE_JITTER, absence_jitter=ABSENCE_JITTER):
+    """Bloques de filas sintéticas (con los tipos del esquema) que suman ``rows``."""
+    rng = np.random.default_rng(seed)
+    seed_df = seed_df[COLUMNS].reset_index(drop=True)
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        chunk = seed_df.iloc[rng.integers(0, len(seed_df), size)].reset_index(drop=True)
+
+        # Desplazamiento común de las tres notas en una parte de las filas.
+        shift = rng.choice([-1, 1], size) * (rng.random(size) < grade_jitter)
+        dropout = chunk["G3"].to_numpy() == 0
+        for grade in GRADES:
+            values = chunk[grade].to_numpy(np.int16) + shift
+            if grade == "G3":
+                values[dropout] = 0
+            chunk[grade] = _clip(values, grade)
+
+        noise = rng.integers(-absence_jitter, absence_jitter + 1, size)
+        chunk["absences"] = _clip(chunk["absences"].to_numpy(np.int16) + noise, "absences")
+        yield chunk
+
+
+def write_csv(path, rows, source=None, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Escribe ``rows`` filas sintéticas en ``path`` con el formato del CSV original."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    seed_df = read_source(source or DEFAULT_SOURCE)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        for number, chunk in enumerate(synthesize(seed_df, rows, seed, chunk_rows)):
+            to_source(chunk).to_csv(fh, sep=CSV_DELIMITER, index=False, header=number == 0)
+    tmp.replace(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un student-por.csv sintético más grande.")
+    parser.add_argument("rows", help="filas a generar: 100K, 1M, 10M o un número")
+    parser.add_argument("-o", "--out", help="CSV de salida (por defecto student-synth-<rows>.csv)")
+    parser.add_argument("--source", help="CSV semilla (por defecto el dataset del proyecto)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    rows = parse_rows(args.rows)
+    out = args.out or f"student-synth-{args.rows.lower()}.csv"
+    write_csv(out, rows, args.source, args.seed, args.chunk_rows)
+    print(f"{rows} filas en {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Pruebas del API contra localhost (``python -m pytest test_api.py`` desde ``Dataset/``).
+
+Levantan la aplicación de :func:`api.make_app` en un puerto local con el dataset del
+repositorio y un caché Arrow temporal, y comparan las respuestas con el cubo y pandas.
+"""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+from tornado.testing import AsyncHTTPTestCase
+
+from api import SharedData, make_app
+from cache import ResultCache
+from filters import age_values
+
+SOURCE = Path(__file__).resolve().parent.parent / "student-por.csv"
+
+
+class ApiTest(AsyncHTTPTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.shared = SharedData(str(SOURCE), cls.cache_dir.name)
+        cls.snapshot = cls.shared.current()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.cache_dir.cleanup()
+
+    def get_app(self):
+        return make_app(self.shared, ResultCache(disk_dir=None), workers=4)
+
+    def get_json(self, path, params=(), status=200):
+        response = self.fetch(f"{path}?{urlencode(params, doseq=True)}")
+        self.assertEqual(response.code, status, response.body)
+        self.assertTrue(response.headers["Content-Type"].startswith("application/json"))
+        return json.loads(response.body)
+
+    @property
+    def data(self):
+        return self.snapshot.data
+
+    def test_count_matches_pandas(self):
+        body = self.get_json("/count", {"school": "GP", "sex": ["F", "M"], "age_min": 16, "age_max": 18,
+                                        "internet": "yes"})
+        expected = self.data[(self.data.school == "GP") & self.data.age.between(16, 18) & self.data.internet]
+        self.assertEqual(body["count"], len(expected))
+        self.assertEqual(body["total"], len(self.data))
+        self.assertEqual(body["filters"], {"age": [16, 17, 18], "internet": ["yes"], "school": ["GP"]})
+
+    def test_aggregate_matches_cube(self):
+        body = self.get_json("/aggregate", {"by": "school,sex", "age_min": 15, "age_max": 17})
+        state = self.snapshot.index.normalize({"age": age_values((15, 17))})
+        expected = self.snapshot.summaries.cube.aggregate(state, ["school", "sex"], "G3").reset_index()
+        got = pd.DataFrame(body["rows"])
+        self.assertEqual(got[["school", "sex"]].values.tolist(), expected[["school", "sex"]].astype(str).values.tolist())
+        np.testing.assert_allclose(got[["count", "mean", "std"]], expected[["count", "mean", "std"]])
+
+    def test_aggregate_outside_cube_matches_pandas(self):
+        # Mjob y romantic no son dimensiones del cubo: se agrupan las filas filtradas.
+        body = self.get_json("/aggregate", {"by": ["Mjob"], "measure": "G1", "romantic": "yes"})
+        expected = (
+            self.data[self.data.romantic].groupby("Mjob", observed=True)["G1"].agg(["count", "mean", "var"])
+        )
+        got = pd.DataFrame(body["rows"]).set_index("Mjob")
+        np.testing.assert_allclose(got[["count", "mean", "var"]], expected)
+
+    def test_bad_filter_value(self):
+        body = self.get_json("/count", {"school": "XX"}, status=400)
+        self.assertEqual(body["status"], 400)
+        self.assertIn("school", body["error"])
+
+    def test_bad_age_range(self):
+        body = self.get_json("/aggregate", {"by": "sex", "age_min": "quince"}, status=400)
+        self.assertIn("age_min", body["error"])
+
+    def test_bad_aggregate_arguments(self):
+        self.assertIn("by", self.get_json("/aggregate", {"by": "G3"}, status=400)["error"])
+        self.assertIn("measure", self.get_json("/aggregate", {"by": "sex", "measure": "x"}, status=400)["error"])
+
+    def test_export_round_trip(self):
+        response = self.fetch("/export?format=csv&school=MS")
+        self.assertEqual(response.code, 200)
+        exported = pd.read_csv(io.BytesIO(response.body), sep=";")
+        self.assertEqual(len(exported), int((self.data.school == "MS").sum()))
@@ -0,0 +1,106 @@
+"""Precalienta el caché persistente del dashboard después de un despliegue.
+
+Ejecuta ``app.py`` sin navegador (``streamlit.testing``) para cada estado de filtros
+de la lista: el estado por defecto de la barra lateral más las combinaciones
+populares indicadas. En cada estado recorre todas las secciones con todos los
+paneles abiertos (y ambos métodos de correlación), así que cada entrada y cada
+gráfico pasa por el mismo código que en producción y queda en el nivel en disco
+de :class:`cache.ResultCache`. El servidor debe usar el mismo ``RESULT_CACHE_DIR``.
+
+Uso::
+
+    RESULT_CACHE_DIR=/var/cache/dashboard python warmup.py --each school --each sex \\
+        --states populares.json
+
+``populares.json`` es una lista de estados; cada estado fija algunos filtros y deja
+el resto en su valor por defecto, por ejemplo ``[{"school": ["GP"], "age": [15, 18]}]``.
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from filters import FilterIndex
+from loader import load_dataset
+
+APP = Path(__file__).resolve().parent / "app.py"
+FILTER_KEYS = ["school", "sex", "age", "address", "Mjob", "internet", "failures"]
+CORRELATION_METHODS = ["Pearson", "Spearman"]
+
+
+def _widget(at, column):
+    key = f"filtro_{column}"
+    return at.slider(key=key) if column == "age" else at.multiselect(key=key)
+
+
+def _apply_state(at, state):
+    for column, value in state.items():
+        if column not in FILTER_KEYS:
+            raise ValueError(f"Filtro desconocido: {column}")
+        _widget(at, column).set_value(tuple(value) if column == "age" else list(value))
+    at.run()
+
+
+def _check(at, context):
+    if at.exception:
+        raise RuntimeError(f"{context}: {at.exception[0].message}")
+
+
+def warm_state(state, timeout=600):
+    """Recorre todas las secciones del dashboard con el estado ``state``."""
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    at.run()
+    _check(at, "arranque")
+    _apply_state(at, state)
+    _check(at, state)
+    sections = at.radio(key="seccion").options
+    for section in sections:
+        at.radio(key="seccion").set_value(section).run()
+        for toggle in at.toggle:
+            toggle.set_value(True)
+        at.run()
+        _check(at, (state, section))
+        methods = [radio for radio in at.radio if radio.key == "metodo_correlacion"]
+        if methods:
+            for method in CORRELATION_METHODS:
+                methods[0].set_value(method).run()
+                _check(at, (state, section, method))
+
+
+def popular_states(each=(), path=None):
+    """Estado por defecto (``{}``), uno por valor de cada columna de ``each`` y los del archivo."""
+    states = [{}]
+    if each:
+        index = FilterIndex(load_dataset(), columns=[c for c in FILTER_KEYS if c != "age"])
+        for column in each:
+            states += [{column: [value]} for value in index.values(column)]
+    if path:
+        states += json.loads(Path(path).read_text())
+    return states
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalienta el caché persistente del dashboard.")
+    parser.add_argument("--each", action="append", default=[], choices=[c for c in FILTER_KEYS if c != "age"],
+                        help="agrega un estado por cada valor de esta columna (repetible)")
+    parser.add_argument("--states", help="archivo JSON con una lista de estados populares")
+    parser.add_argument("--timeout", type=int, default=600, help="segundos máximos por rerun")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("RESULT_CACHE_DIR"):
+        parser.error("Define RESULT_CACHE_DIR (el mismo que usa el servidor) para persistir el caché")
+
+    states = popular_states(args.each, args.states)
+    for number, state in enumerate(states, 1):
+        start = time.perf_counter()
+        warm_state(state, args.timeout)
+        label = json.dumps(state, default=str) if state else "por defecto"
+        print(f"[{number}/{len(states)}] {label}: {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
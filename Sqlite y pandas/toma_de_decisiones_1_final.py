@@ -15,13 +15,16 @@ from google.colab import files
 import io
 import pandas as pd
 import sqlite3
-uploaded_file_key = list(uploaded.keys())[0]
-df = pd.read_csv(io.BytesIO(uploaded[uploaded_file_key]))
-print(df.head()) # Muestra las primeras filas del DataFrame
-
-filename = list(uploaded.keys())[0]
-
-df = pd.read_csv(io.BytesIO(uploaded[filename]), sep=';')
+import sys
+sys.path.append('Dataset')
+from loader import read_chunks
+
+# Se pueden subir varios student-*.csv (uno por colegio y año); cada archivo se
+# lee una sola vez, con ';' como separador, por bloques ya validados con el esquema.
+df = pd.concat(
+    read_chunks(io.BytesIO(content) for content in uploaded.values()),
+    ignore_index=True,
+)
 print(df.head())
 
 print(df.columns)
@@ -46,33 +49,37 @@ print(tabulate(df.tail(5), headers='keys', tablefmt='psql'))
 
 # prompt: data.groupby(["sex", "age"])["G3"].mean()
 
-grouped_data = df.groupby(["sex", "age"])["G3"].mean()
+grouped_data = df.groupby(["sex", "age"], observed=True)["G3"].mean()
 grouped_data
 
-conn = sqlite3.connect('student-por.db')
-data = pd.read_sql_query("SELECT * from student_por", conn)
-conn.close()
+# Almacén SQLite del dashboard (Dataset/store.py): tabla student_por tipada, con
+# índices en school, sex, age, schoolsup e internet, y tablas resumen que se
+# actualizan solas con cada inserción. Todas las consultas del cuaderno usan el
+# mismo pool de conexiones (Dataset/db.py) en lugar de abrir una por consulta.
+import store
+import sqlquery
+from filters import FilterState
+from schema import YES_NO_LABELS
+
+pool = store.open_store('student-por.db')
+with pool.writer() as conn:
+    store.load_frame(conn, df)
+
+with pool.connection() as conn:
+    data = store.read_students(conn)
 
 print("Identificación de valores faltantes:")
 missing_values = data.isnull().sum()
 print(tabulate(missing_values.reset_index(), headers=['Columna', 'Valores Faltantes'], tablefmt='psql'))
 
-!apt install sqlite3
-
-conn = sqlite3.connect('student-por.db')  # Changed database name
-df.to_sql('student_por', conn, if_exists='replace', index=False)  # Changed table name
-conn.close()
-
-!sqlite3 student-por.db
 
-"""CREATE TABLE barras_col AS SELECT sex, G3, school FROM student_por;  SELECT * FROM barras_col LIMIT 5;
+"""Las proyecciones barras_col, barrasG3, rendimiento y apoyo ya no se copian con
+CREATE TABLE AS: store.create_schema las define como vistas sobre student_por.
 
-CREATE TABLE barrasG3 AS SELECT G3, age, sex FROM student_por;  SELECT * FROM barrasG3 LIMIT 5;
-
-CREATE TABLE rendimiento AS SELECT G1, G2, G3, absences, studytime, sex FROM
-student_por;  SELECT * FROM rendimiento LIMIT 5;
-
-CREATE TABLE apoyo AS SELECT G3, schoolsup, famsup, internet, studytime FROM student_por;  SELECT * FROM apoyo LIMIT 5;
+barras_col  = SELECT sex, G3, school FROM student_por
+barrasG3    = SELECT G3, age, sex FROM student_por
+rendimiento = SELECT G1, G2, G3, absences, studytime, sex FROM student_por
+apoyo       = SELECT G3, schoolsup, famsup, internet, studytime FROM student_por
 
 # Ahora vamos a exportarlas de sql
 
@@ -85,24 +92,22 @@ compuesta por
 
 import matplotlib.pyplot as plt
 import seaborn as sns
+from charts import label_bars
 
-conn = sqlite3.connect('student-por.db')
-query = "SELECT * FROM barras_col"
-df_barras_col = pd.read_sql_query(query, conn)
-conn.close()
+df_barras_col = pool.query_frame("SELECT * FROM barras_col")
 
 print(df_barras_col.head())
 
+# Las medias se calculan en SQLite (GROUP BY); solo vuelven las filas agregadas
+with pool.connection() as conn:
+    g3_school_sex = sqlquery.mean(conn, FilterState(), ['school', 'sex']).reset_index()
+
 # Graficar la relación entre el sexo y las notas G3 por colegio con etiquetas
 plt.figure(figsize=(10, 6))
-ax = sns.barplot(x='school', y='G3', hue='sex', data=df_barras_col)
+ax = sns.barplot(x='school', y='G3', hue='sex', data=g3_school_sex, errorbar=None)
 
-# Añadir etiquetas a las barras
-for p in ax.patches:
-    ax.annotate(f'{p.get_height():.2f}',
-                (p.get_x() + p.get_width() / 2., p.get_height()),
-                ha='center', va='center', fontsize=12, color='black',
-                xytext=(0, 5), textcoords='offset points')
+# Añadir etiquetas a todas las barras de una vez
+label_bars(ax, fmt='%.2f', fontsize=12)
 
 # Título y etiquetas
 plt.title('Relación entre Sexo y Nota final (G3) por Colegio')
@@ -119,36 +124,26 @@ compuesta por
   - ageahora
 """
 
-conn = sqlite3.connect('student-por.db')
-query = "SELECT * FROM barrasG3"
-df_barrasG3 = pd.read_sql_query(query, conn)
-conn.close()
+df_barrasG3 = pool.query_frame("SELECT * FROM barrasG3")
 
 print(df_barrasG3.head())
 
+with pool.connection() as conn:
+    g3_age_sex = sqlquery.mean(conn, FilterState(), ['age', 'sex']).reset_index()
+
 # Configurar el gráfico
 plt.figure(figsize=(12, 6))
 barplot = sns.barplot(
     x='age',  # Edad en el eje X
     y='G3',   # Nota final en el eje Y
     hue='sex',  # Agrupar por sexo
-    data=df_barrasG3,  # DataFrame actualizado
+    data=g3_age_sex,  # Medias por edad y sexo calculadas en SQL
     errorbar=None,  # Deshabilitar intervalos de error
     palette='Set2'  # Paleta de colores
 )
 
-# Agregar etiquetas a las barras
-for p in barplot.patches:
-    if p.get_height() > 0:  # Evitar etiquetas en barras con altura cero
-        barplot.annotate(
-            format(p.get_height(), '.1f'),  # Formato de la etiqueta (1 decimal)
-            (p.get_x() + p.get_width() / 2., p.get_height()),  # Posición de la etiqueta
-            ha='center',  # Alinear horizontalmente
-            va='center',  # Alinear verticalmente
-            xytext=(0, 5),  # Desplazamiento en píxeles
-            textcoords='offset points',  # Coordenadas relativas
-            fontsize=10  # Tamaño de la etiqueta
-        )
+# Agregar etiquetas a las barras (1 decimal)
+label_bars(barplot, fmt='%.1f', fontsize=10)
 
 # Personalizar el gráfico
 plt.title('Nota final G3 por Edad y Sexo', fontsize=16)
@@ -173,10 +168,7 @@ compuesta por
   - sex
 """
 
-conn = sqlite3.connect('student-por.db')
-query = "SELECT * FROM rendimiento"
-df_rendimiento = pd.read_sql_query(query, conn)
-conn.close()
+df_rendimiento = pool.query_frame("SELECT * FROM rendimiento")
 
 print(df_rendimiento.head())
 
@@ -259,45 +251,38 @@ compuesta por
   - internet
 """
 
-conn = sqlite3.connect('student-por.db')
-query = "SELECT * FROM apoyo"
-df_apoyo = pd.read_sql_query(query, conn)
-conn.close()
+df_apoyo = pool.query_frame("SELECT * FROM apoyo")
 
 print(df_apoyo.head())
 
+with pool.connection() as conn:
+    g3_schoolsup = sqlquery.mean(conn, FilterState(), 'schoolsup').reset_index()
+    g3_famsup = sqlquery.mean(conn, FilterState(), 'famsup').reset_index()
+g3_schoolsup['schoolsup'] = g3_schoolsup['schoolsup'].map(YES_NO_LABELS)
+g3_famsup['famsup'] = g3_famsup['famsup'].map(YES_NO_LABELS)
+
 # Impacto del apoyo escolar en la Nota final (G3)
 plt.figure(figsize=(8, 6))
-barplot_schoolsup = sns.barplot(x='schoolsup', y='G3', data=df_apoyo)
+barplot_schoolsup = sns.barplot(x='schoolsup', y='G3', data=g3_schoolsup, errorbar=None)
 plt.title('Impacto del Apoyo Escolar en la Nota Final (G3)', fontsize=14)
 plt.xlabel('Apoyo Escolar', fontsize=12)
 plt.ylabel('Nota Final (G3)', fontsize=12)
 
 # Agregar etiquetas a las barras
-for p in barplot_schoolsup.patches:
-    barplot_schoolsup.annotate(f'{p.get_height():.2f}',
-                               (p.get_x() + p.get_width() / 2., p.get_height()),
-                               ha='center', va='center',
-                               fontsize=12, color='black',
-                               xytext=(0, 8), textcoords='offset points')
+label_bars(barplot_schoolsup, fmt='%.2f', fontsize=12)
 
 plt.tight_layout()
 plt.show()
 
 # Impacto del apoyo familiar en la Nota final (G3)
 plt.figure(figsize=(8, 6))
-barplot_famsup = sns.barplot(x='famsup', y='G3', data=df_apoyo)
+barplot_famsup = sns.barplot(x='famsup', y='G3', data=g3_famsup, errorbar=None)
 plt.title('Impacto del Apoyo Familiar en la Nota Final (G3)', fontsize=14)
 plt.xlabel('Apoyo Familiar', fontsize=12)
 plt.ylabel('Nota Final (G3)', fontsize=12)
 
 # Agregar etiquetas a las barras
-for p in barplot_famsup.patches:
-    barplot_famsup.annotate(f'{p.get_height():.2f}',
-                            (p.get_x() + p.get_width() / 2., p.get_height()),
-                            ha='center', va='center',
-                            fontsize=12, color='black',
-                            xytext=(0, 8), textcoords='offset points')
+label_bars(barplot_famsup, fmt='%.2f', fontsize=12)
 
 plt.tight_layout()
 plt.show()